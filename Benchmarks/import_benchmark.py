@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:06:45 2026
+
+@author: Kyle
+"""
+
+# measures how long importing each module takes, in a fresh interpreter every time, and which of the heavy optional
+# libraries it pulls in. the commands of the command-line interface (see vmpff/general/cli.py) are measured the same
+# way, from importing it to the end of the command, on small synthetic files. usage:
+#     python import_benchmark.py [--repeats N] [--output results.json]
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+MYDIR = os.path.dirname(os.path.abspath(__file__))
+
+import synthetic
+
+# modules to import, in the order they build on each other
+MODULES = [
+        "vmpff", 
+        "vmpff.general.common", 
+        "vmpff.general.instrumentation", 
+        "vmpff.biologic.VMPff", 
+        "vmpff.mticyc.BTSff", 
+        "vmpff.general.batch", 
+        "vmpff.general.cycle_tools", 
+        "vmpff.general.export", 
+        "vmpff.biologic.cycle_metrics", 
+        "vmpff.mticyc.cycle_metrics", 
+        "vmpff.general.cli", 
+        ]
+# libraries the parsing core should not need
+HEAVY_MODULES = ["pandas", "matplotlib", "scipy", "pyarrow", "tables"]
+SEARCH_PATH = [os.path.join(MYDIR, "..")]
+# commands of the command-line interface, with {mpr} and {nda} standing for synthetic files of COMMAND_ROWS records
+COMMANDS = [
+        ["info", "{mpr}", "--workers", "1"], 
+        ["info", "{nda}", "--workers", "1"], 
+        ]
+COMMAND_ROWS = 1000
+
+# run by each fresh interpreter, printing the import time and the heavy libraries loaded as JSON
+PROBE = """
+import sys
+sys.path[: 0] = %r
+import time
+import importlib
+start = time.perf_counter()
+importlib.import_module(%r)
+elapsed = time.perf_counter() - start
+import json
+print(json.dumps({"elapsed_s": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+"""
+# the same for a command of the command-line interface, whose output is discarded
+COMMAND_PROBE = """
+import sys
+sys.path[: 0] = %r
+import io
+import time
+import contextlib
+start = time.perf_counter()
+from vmpff.general import cli
+with contextlib.redirect_stdout(io.StringIO()):
+    status = cli.main(%r)
+elapsed = time.perf_counter() - start
+assert status == 0
+import json
+print(json.dumps({"elapsed_s": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+# runs a probe in repeats fresh interpreters
+def measureProbe(name, probe, repeats):
+    times = []
+    for i in range(repeats):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output = True, text = True, check = True).stdout
+        result = json.loads(output)
+        times.append(result["elapsed_s"])
+        
+    return {
+            "name": name, 
+            "times_s": times, 
+            "min_s": min(times), 
+            "median_s": float(np.median(times)), 
+            "loaded": result["loaded"], 
+            }
+
+def measureImport(module, repeats):
+    return measureProbe(module, PROBE % (SEARCH_PATH, module, HEAVY_MODULES), repeats)
+
+# files are the synthetic files to fill in the command with
+def measureCommand(command, files, repeats):
+    argv = [arg.format(**files) for arg in command]
+    return measureProbe("vmpff " + " ".join(command), COMMAND_PROBE % (SEARCH_PATH, argv, HEAVY_MODULES), repeats)
+
+def measureCommands(commands, repeats):
+    with tempfile.TemporaryDirectory() as workDir:
+        files = {"mpr": os.path.join(workDir, "cell.mpr"), "nda": os.path.join(workDir, "cell.nda")}
+        synthetic.writeMPR(files["mpr"], COMMAND_ROWS)
+        synthetic.writeNDA(files["nda"], COMMAND_ROWS)
+        return [measureCommand(command, files, repeats) for command in commands]
+
+# import time of the interpreter alone, which every command pays on top of the imports
+def measureStartup(repeats):
+    times = []
+    for i in range(repeats):
+        startTime = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check = True)
+        times.append(time.perf_counter() - startTime)
+        
+    return float(np.median(times))
+
+def run(args):
+    return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), 
+            "platform": platform.platform(), 
+            "python": platform.python_version(), 
+            "parameters": vars(args), 
+            "startup_s": measureStartup(args.repeats), 
+            "results": [measureImport(module, args.repeats) for module in args.modules], 
+            "commands": measureCommands(COMMANDS, args.repeats) if args.commands else [], 
+            }
+
+def printResults(report):
+    print("interpreter startup: %0.4f s" % (report["startup_s"]))
+    print("%-32s %12s  %s" % ("module", "median (s)", "heavy libraries loaded"))
+    for r in report["results"] + report["commands"]:
+        print("%-32s %12.4f  %s" % (r["name"], r["median_s"], ", ".join(r["loaded"]) or "-"))
+        
+    return
+
+def parseArgs(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks the import time of the modules.")
+    parser.add_argument("--modules", nargs = "*", default = MODULES, help = "modules to import")
+    parser.add_argument("--repeats", type = int, default = 5, help = "fresh interpreters per module")
+    parser.add_argument("--no-commands", dest = "commands", action = "store_false", help = "skip the commands of the command-line interface")
+    parser.add_argument("--output", default = None, help = "save the results to this JSON file")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parseArgs()
+    report = run(args)
+    printResults(report)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 4)
+            
\ No newline at end of file
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:48:30 2026
+
+@author: Kyle
+"""
+
+# benchmarks every parse mode on synthetic files, plus calculate_CE on the parsed experiments, and saves the results
+# as JSON. runs offline, as the files are generated on the spot. usage:
+#     python parser_benchmark.py [--rows N] [--output results.json] ...
+# to compare two sets of results (e.g. from two commits):
+#     python parser_benchmark.py --compare before.json after.json
+
+import os
+import gc
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+MYDIR = os.path.dirname(__file__)
+
+import sys
+sys.path.append(MYDIR)
+sys.path.append(os.path.join(MYDIR, ".."))
+import synthetic
+from vmpff.general import instrumentation
+from vmpff.biologic import VMPff
+from vmpff.mticyc import BTSff
+# both instruments have a module named cycle_metrics
+from vmpff.biologic import cycle_metrics as biologic_cycle_metrics
+from vmpff.mticyc import cycle_metrics as mticyc_cycle_metrics
+
+# the plain parse() decodes record by record, which takes minutes on files of the default size
+LOOP_MAX_ROWS = 20000
+# columns decoded by the projected parse modes
+PROJECTED_COLUMNS = ["time", "Ewe", "Q-Q0", "Ns", "half cycle"]
+
+# runs func repeats times and returns the wall time of each run and the time spent in each parsing stage on the last
+# run, then runs it once more under tracemalloc for the peak memory allocated (mapped files do not count)
+def measure(func, repeats):
+    times = []
+    for i in range(repeats):
+        gc.collect()
+        with instrumentation.recording() as recorder:
+            startTime = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - startTime)
+            
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        
+    return times, recorder.totals(), peak
+
+def summarize(name, fileName, rows, times, stages, peak, **extra):
+    median = float(np.median(times))
+    numBytes = os.path.getsize(fileName)
+    r = {
+            "name": name, 
+            "rows": rows, 
+            "bytes": numBytes, 
+            "times_s": times, 
+            "min_s": min(times), 
+            "median_s": median, 
+            "rows_per_s": rows / median, 
+            "MB_per_s": numBytes / median / 1E6, 
+            "peak_bytes": peak, 
+            "stages_s": stages, 
+            }
+    r.update(extra)
+    return r
+
+# time to the first chunk, i.e. how long until the first rows can be used
+def firstChunkLatency(chunks):
+    startTime = time.perf_counter()
+    next(chunks)
+    latency = time.perf_counter() - startTime
+    chunks.close()
+    return latency
+
+def parseMPR(fileName, version, mode, memmap = False, workers = None, columns = None, views = False):
+    x, y = VMPff.fromFile(fileName, version, memmap = memmap, columns = columns, views = views)
+    if mode == "Loop":
+        y.parse()
+        return pd.DataFrame(y.dataList)
+    
+    return y.getDataFrame(mp = mode, workers = workers)
+
+def chunkMPR(fileName, version, rows):
+    x, y = VMPff.fromFile(fileName, version, memmap = True)
+    return y.iterChunks(rows)
+
+def benchmarkMPR(workDir, version, args):
+    fileName = os.path.join(workDir, "bench%d.mpr" % (version))
+    synthetic.writeMPR(fileName, args.rows, version, cycles = args.cycles)
+    loopFileName = os.path.join(workDir, "bench%d_loop.mpr" % (version))
+    synthetic.writeMPR(loopFileName, min(args.rows, LOOP_MAX_ROWS), version, cycles = args.cycles)
+    tag = "MPR %d" % (version)
+    results = []
+    cases = [
+            ("Loop", loopFileName, min(args.rows, LOOP_MAX_ROWS), lambda: parseMPR(loopFileName, version, "Loop")), 
+            ("Vec", fileName, args.rows, lambda: parseMPR(fileName, version, "Vec")), 
+            ("Vec memmap", fileName, args.rows, lambda: parseMPR(fileName, version, "Vec", memmap = True)), 
+            ("Vec views", fileName, args.rows, lambda: parseMPR(fileName, version, "Vec", memmap = True, views = True)), 
+            ("Vec projected", fileName, args.rows, lambda: parseMPR(fileName, version, "Vec", memmap = True, columns = PROJECTED_COLUMNS)), 
+            ("MP", fileName, args.rows, lambda: parseMPR(fileName, version, "MP", workers = args.workers)), 
+            ("chunks", fileName, args.rows, lambda: sum(len(chunk) for chunk in chunkMPR(fileName, version, args.chunk_rows))), 
+            ]
+    for mode, caseFileName, rows, func in cases:
+        times, stages, peak = measure(func, args.repeats)
+        extra = dict()
+        if mode == "chunks":
+            extra["first_chunk_s"] = firstChunkLatency(chunkMPR(fileName, version, args.chunk_rows))
+            
+        results.append(summarize("%s %s" % (tag, mode), caseFileName, rows, times, stages, peak, **extra))
+        
+    experiment = biologic_cycle_metrics.BiologicMODE1CyclingExperiment(1., version = version)
+    experiment.fromFile(fileName)
+    results.append(benchmarkCE("%s calculate_CE" % (tag), fileName, experiment, args.repeats))
+    results.append(benchmarkVvsCapacity("%s VvsCapacity" % (tag), fileName, experiment, args.repeats))
+    return results
+
+def benchmarkNDA(workDir, args):
+    fileName = os.path.join(workDir, "bench.nda")
+    synthetic.writeNDA(fileName, args.rows, cycles = args.cycles, invalid_every = args.invalid_every)
+    results = []
+    cases = [
+            ("fromFile", lambda: BTSff.fromFile(fileName)), 
+            ("fromFile projected", lambda: BTSff.fromFile(fileName, columns = PROJECTED_COLUMNS)), 
+            ("chunks", lambda: sum(len(chunk) for chunk in BTSff.iterChunks(fileName, args.chunk_rows))), 
+            ]
+    for mode, func in cases:
+        times, stages, peak = measure(func, args.repeats)
+        extra = dict()
+        if mode == "chunks":
+            extra["first_chunk_s"] = firstChunkLatency(BTSff.iterChunks(fileName, args.chunk_rows))
+            
+        results.append(summarize("NDA %s" % (mode), fileName, args.rows, times, stages, peak, **extra))
+        
+    experiment = mticyc_cycle_metrics.MTICycMODE1CyclingExperiment(1.)
+    experiment.fromFile(fileName)
+    results.append(benchmarkCE("NDA calculate_CE", fileName, experiment, args.repeats))
+    results.append(benchmarkVvsCapacity("NDA VvsCapacity", fileName, experiment, args.repeats))
+    return results
+
+# calculate_CE, including building the segment index, which is otherwise only done on first use
+def benchmarkCE(name, fileName, experiment, repeats):
+    def run():
+        experiment.segment_index = None
+        return experiment.calculate_CE()
+    
+    times, stages, peak = measure(run, repeats)
+    return summarize(name, fileName, len(experiment.measurement_sequence), times, stages, peak, cycles = len(run()))
+
+# voltage versus capacity of every half cycle, stitched for overlaying
+def benchmarkVvsCapacity(name, fileName, experiment, repeats):
+    keys = list(experiment.getHalfCycleTable().index)
+    times, stages, peak = measure(lambda: experiment.VvsCapacity_hcs(keys, add_breaks = True), repeats)
+    return summarize(name, fileName, len(experiment.measurement_sequence), times, stages, peak, half_cycles = len(keys))
+
+def gitCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd = MYDIR or ".", capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    
+def run(args):
+    results = []
+    with tempfile.TemporaryDirectory(dir = args.work_dir) as workDir:
+        for version in args.versions:
+            results.extend(benchmarkMPR(workDir, version, args))
+            
+        if args.nda:
+            results.extend(benchmarkNDA(workDir, args))
+            
+    return {
+            "commit": gitCommit(), 
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), 
+            "platform": platform.platform(), 
+            "python": platform.python_version(), 
+            "numpy": np.__version__, 
+            "pandas": pd.__version__, 
+            "cpus": os.cpu_count(), 
+            "parameters": vars(args), 
+            "results": results, 
+            }
+
+def printResults(report):
+    print("%-24s %10s %12s %14s %10s %12s" % ("benchmark", "rows", "median (s)", "rows/s", "MB/s", "peak (MB)"))
+    for r in report["results"]:
+        print("%-24s %10d %12.4f %14.0f %10.1f %12.1f" % (r["name"], r["rows"], r["median_s"], r["rows_per_s"], r["MB_per_s"], r["peak_bytes"] / 1E6))
+        
+    return
+
+# prints the change in median time and peak memory of every benchmark found in both sets of results
+def compare(before, after):
+    with open(before) as f:
+        old = {r["name"]: r for r in json.load(f)["results"]}
+        
+    with open(after) as f:
+        new = {r["name"]: r for r in json.load(f)["results"]}
+        
+    print("%-24s %12s %12s %9s %12s" % ("benchmark", "before (s)", "after (s)", "time", "peak"))
+    for name in new:
+        if name not in old:
+            continue
+        
+        print("%-24s %12.4f %12.4f %8.2fx %11.2fx" % (name, old[name]["median_s"], new[name]["median_s"], new[name]["median_s"] / old[name]["median_s"], new[name]["peak_bytes"] / max(1, old[name]["peak_bytes"])))
+        
+    return
+
+def parseArgs(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks the parsers on synthetic files.")
+    parser.add_argument("--rows", type = int, default = 1000000, help = "records per file")
+    parser.add_argument("--cycles", type = int, default = 100, help = "cycles per file")
+    parser.add_argument("--versions", type = int, nargs = "*", default = VMPff.ACCEPTED_VERSIONS, help = "MPR versions to benchmark")
+    parser.add_argument("--no-nda", dest = "nda", action = "store_false", help = "skip the NDA benchmarks")
+    parser.add_argument("--invalid-every", type = int, default = 1000, help = "mark every n-th NDA record invalid")
+    parser.add_argument("--repeats", type = int, default = 3, help = "timed runs per benchmark")
+    parser.add_argument("--workers", type = int, default = None, help = "workers for the MP parse mode")
+    parser.add_argument("--chunk-rows", type = int, default = 1 << 18, help = "records per chunk for the chunked modes")
+    parser.add_argument("--work-dir", default = None, help = "directory for the synthetic files")
+    parser.add_argument("--output", default = None, help = "save the results to this JSON file")
+    parser.add_argument("--compare", nargs = 2, metavar = ("BEFORE", "AFTER"), help = "compare two result files instead")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parseArgs()
+    if args.compare is not None:
+        compare(*args.compare)
+    else:
+        report = run(args)
+        printResults(report)
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent = 4)
+                
\ No newline at end of file
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:20:51 2026
+
+@author: Kyle
+"""
+
+# compares the vectorized step accumulation in BTSff with the original loops on synthetic step-heavy data, checking
+# that both give identical results. usage: python step_accumulation.py [records] [steps]
+
+import os
+import time
+import numpy as np
+
+MYDIR = os.path.dirname(__file__)
+
+import sys
+sys.path.append(os.path.join(MYDIR, ".."))
+from vmpff.mticyc import BTSff
+
+# the original implementations, kept as the reference
+def findHalfStepChangesLoop(series, triggers):
+    changes = []
+    for trigger in triggers:
+        hot = np.where(series == trigger)[0]
+        leading_edge_idcs = np.where(np.diff(hot) != 1)[0] + 1
+        hot_leading_edges = np.maximum(0, hot[leading_edge_idcs] - 1)
+        first = max([0, hot[0] - 1])
+        if first not in hot_leading_edges:
+            hot_leading_edges = np.concatenate([[first], hot_leading_edges], axis = 0)
+            
+        changes.append(hot_leading_edges)
+        
+    return np.sort(np.concatenate(changes, axis = 0))
+
+def accumulateSeriesStepsLoop(series, change_indices, a = 0.):
+    r = np.zeros(len(series))
+    mark = 0
+    for change_index in change_indices:
+        r[mark: change_index + 1] = a + series[mark: change_index + 1]
+        a += series[change_index]
+        mark = change_index + 1
+        
+    r[mark: ] = a + series[mark: ]
+    return r
+
+def fillCountLoop(series_size, change_indices, a = 0):
+    r = np.zeros(series_size, dtype = int)
+    mark = 0
+    for change_index in change_indices:
+        r[mark: change_index + 1] = a
+        a += 1
+        mark = change_index + 1
+        
+    r[mark: ] = a
+    return r
+
+# a cycling sequence of charge, rest, discharge, rest steps of random length, with step time and capacity
+# counting up from zero within each step
+def makeSteps(records, steps, seed = 0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.multinomial(records - steps, np.full(steps, 1. / steps)) + 1
+    cyclingModes = np.array((BTSff.BTS_STEP_TYPES.index("CC_charge"), BTSff.BTS_STEP_TYPES.index("Rest"), BTSff.BTS_STEP_TYPES.index("CC_discharge"), BTSff.BTS_STEP_TYPES.index("Rest")), dtype = np.uint8)
+    Ns = np.repeat(np.arange(steps, dtype = np.uint32), lengths)
+    mode = np.repeat(cyclingModes[np.arange(steps) % len(cyclingModes)], lengths)
+    within = np.arange(records) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    step_time = within * 10.
+    Q = within * 1e-3 * rng.random(records)
+    return Ns, mode, step_time, Q
+
+def timeCall(func, *args, repeats = 3):
+    best = np.inf
+    for i in range(repeats):
+        startTime = time.perf_counter()
+        r = func(*args)
+        best = min(best, time.perf_counter() - startTime)
+        
+    return best, r
+
+def run(records = 2000000, steps = 50000):
+    Ns, mode, step_time, Q = makeSteps(records, steps)
+    triggers = (BTSff.BTS_STEP_TYPES.index("CC_discharge"), BTSff.BTS_STEP_TYPES.index("CC_charge"))
+    step_changes = BTSff.findStepChanges(Ns)
+    half_step_changes = BTSff.findHalfStepChanges(mode, triggers)
+    cases = [
+            ("findHalfStepChanges", findHalfStepChangesLoop, BTSff.findHalfStepChanges, (mode, triggers)), 
+            ("fillCount", fillCountLoop, BTSff.fillCount, (records, half_step_changes)), 
+            ("accumulateSeriesSteps (time)", accumulateSeriesStepsLoop, BTSff.accumulateSeriesSteps, (step_time, step_changes)), 
+            ("accumulateSeriesSteps (Q)", accumulateSeriesStepsLoop, BTSff.accumulateSeriesSteps, (Q, step_changes)), 
+            ]
+    print("%d records, %d steps" % (records, steps))
+    for name, loop, vectorized, args in cases:
+        loopTime, expected = timeCall(loop, *args)
+        vectorizedTime, actual = timeCall(vectorized, *args)
+        assert np.array_equal(expected, actual), "%s differs from the reference" % (name)
+        print("%-30s loop %9.3f ms  vectorized %9.3f ms  speedup %6.1fx" % (name, loopTime * 1e3, vectorizedTime * 1e3, loopTime / vectorizedTime))
+        
+    return
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1: ]])
+    
\ No newline at end of file
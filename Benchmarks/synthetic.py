@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:05:12 2026
+
+@author: Kyle
+"""
+
+# writers for synthetic MPR and NDA files of any size, for benchmarking without real data. the files hold a constant-
+# capacity cycling experiment (an initial rest, then alternating plating and stripping half cycles, each followed by
+# a rest) laid out like the MODE1 cycling experiments in the instrument cycle_metrics, so calculate_CE works on them
+
+import os
+import struct
+import numpy as np
+
+MYDIR = os.path.dirname(__file__)
+
+import sys
+sys.path.append(os.path.join(MYDIR, ".."))
+from vmpff.general import common
+from vmpff.biologic import VMPff
+from vmpff.mticyc import BTSff
+
+# columns needed to index half cycles and calculate Coulombic efficiencies
+MPR_CYCLING_CODES = [1, 4, 6, 0xd, 0x83, 0x1d4]
+# columns of a typical galvanostatic cycling file
+MPR_DEFAULT_CODES = [1, 2, 3, 4, 5, 6, 7, 0xd, 0x15, 0x18, 0x1f, 0x41, 0x46, 0x4c, 0x4d, 0x7b, 0x7c, 0x83, 0x1d4]
+
+MODULE_VERSION = 3
+MODULE_DATE = b"10/18/26"
+
+# fraction of each half cycle spent resting at its end
+REST_FRACTION = 0.2
+# seconds between records, current (mA) and capacity per record (mAh) of the synthetic experiment
+TIME_STEP = 1.5
+CURRENT = 1.
+DQ = 1E-2
+
+# half cycle of every record: 0 for the initial rest, then 1, 2, ... for alternating plating and stripping. returns
+# the half cycle, whether the record is resting and the position of the record within its half cycle
+def cyclingSegments(rows, cycles):
+    num_segments = 2 * cycles + 1
+    segment = np.arange(rows) * num_segments // rows
+    starts = (np.arange(num_segments) * rows + num_segments - 1) // num_segments
+    within = np.arange(rows) - starts[segment]
+    lengths = np.diff(np.append(starts, rows))[segment]
+    rest = (segment == 0) | (within >= (1. - REST_FRACTION) * lengths)
+    return segment, rest, within
+
+def moduleHeader(sn, ln, dataSize, version):
+    header = VMPff.HEADER + sn.ljust(VMPff.MODULE_SN_SIZE, b" ") + ln.ljust(VMPff.MODULE_LN_SIZE, b" ")
+    if version == 1152:
+        header += struct.pack("<IQ", VMPff.WIDE_HEADER_MARKER, dataSize)
+    else:
+        header += struct.pack("<I", dataSize)
+        
+    return header + struct.pack("<I", MODULE_VERSION) + MODULE_DATE
+
+# values of every known column for a cycling experiment of the given size, by column name
+def mprColumns(rows, cycles, rng):
+    segment, rest, within = cyclingSegments(rows, cycles)
+    plating = (segment % 2 == 1) & ~rest
+    stripping = (segment % 2 == 0) & (segment > 0) & ~rest
+    current = np.where(plating, -CURRENT, np.where(stripping, CURRENT, 0.))
+    dq = np.where(rest, 0., current * DQ)
+    changes = np.append([1], np.diff(segment) != 0).astype(np.uint8)
+    time = np.arange(rows) * TIME_STEP
+    Ewe = 3. + 0.1 * np.sign(current) + 0.01 * rng.standard_normal(rows)
+    Q = np.cumsum(dq)
+    return {
+            "mode": np.where(rest, VMPff.REST_MODE, 1), 
+            "ox/red": stripping.astype(np.uint8), 
+            "error": np.zeros(rows, dtype = np.uint8), 
+            "time": time, 
+            "control I": current, 
+            "Ewe": Ewe, 
+            "dq": dq, 
+            "Q-Q0": Q, 
+            "control change": changes, 
+            "cycle number": np.maximum(segment - 1, 0) // 2, 
+            "Ns change": changes, 
+            "counter change": changes, 
+            "P": Ewe * current, 
+            "<I>": current, 
+            "<Ewe>": Ewe, 
+            "Energy charge": np.cumsum(np.where(stripping, Ewe * dq, 0.)), 
+            "Energy discharge": np.cumsum(np.where(plating, -Ewe * dq, 0.)), 
+            "Ns": np.where(segment == 0, 0, 2 - segment % 2), 
+            "Step time": within * TIME_STEP, 
+            "Q charge/discharge": np.abs(Q - Q[np.searchsorted(segment, segment)]), 
+            "half cycle": np.maximum(segment - 1, 0), 
+            }
+
+# the records of an MPR file with the given data codes, as a structured array
+def mprRecords(rows, codes, cycles = 10, seed = 0):
+    rng = np.random.default_rng(seed)
+    values = mprColumns(rows, cycles, rng)
+    columns = [VMPff.parseVMPDataCode(code) for code in codes]
+    record_spec = []
+    if any(column[VMPff.COL_FMT] is None for column in columns):
+        record_spec.append(("flags", np.uint8))
+        
+    for column in columns:
+        if column[VMPff.COL_FMT] is not None:
+            record_spec.append((column[VMPff.COL_NAME], common.NP_TYPES[column[VMPff.COL_FMT]]))
+            
+    records = np.zeros(rows, dtype = record_spec)
+    for column in columns:
+        # columns we know nothing about get random values
+        value = values[column[VMPff.COL_NAME]] if column[VMPff.COL_NAME] in values else rng.random(rows)
+        if column[VMPff.COL_FMT] is None:
+            # flag value
+            records["flags"] |= (value.astype(np.uint8) & ((1 << column[VMPff.COL_FSIZE]) - 1)) << column[VMPff.COL_FBIT]
+        else:
+            records[column[VMPff.COL_NAME]] = value
+            
+    return records
+
+# writes an MPR file of the given software version (one of VMPff.ACCEPTED_VERSIONS) with rows records of the columns
+# given by codes (keys of VMPff.VMP_DATA_FIELD_LIST). with written set, the file holds only the first written records
+# of the experiment, as left by an instrument that is still running. returns the records written
+def writeMPR(fileName, rows, version = 1146, codes = MPR_DEFAULT_CODES, cycles = 10, seed = 0, written = None):
+    assert version in VMPff.ACCEPTED_VERSIONS, "Version %s not supported" % (version)
+    records = mprRecords(rows, codes, cycles, seed)
+    if written is not None:
+        records = records[: written]
+        
+    header = struct.pack("<I", len(records)) + struct.pack("<H" if version == 1152 else "<B", len(codes)) + b"".join(struct.pack("<H", code) for code in codes)
+    data = header.ljust(VMPff.DATA_HEADER_SIZE[version], b"\x00") + records.tobytes()
+    if version == 1101:
+        # this version writes an extra record after the last one
+        data += bytes(records.dtype.itemsize)
+        
+    settings = bytes(1000)
+    with open(fileName, "wb") as f:
+        f.write(VMPff.FILE_HEADER)
+        f.write(moduleHeader(b"VMP Set", b"VMP settings", len(settings), version) + settings)
+        f.write(moduleHeader(b"VMP data", b"VMP data", len(data), version) + data)
+        
+    return records
+
+# the step definitions of an NDA file follow the memo field
+NDA_HEADER_SIZE = BTSff.USERNAME_OFFS + BTSff.USERNAME_LEN + BTSff.BATCH_LEN + BTSff.MEMO_LEN
+
+# step definitions of the synthetic NDA file: (step type, parameters)
+NDA_STEPS = [
+        ("Rest", [3600, 0, 0, 0, 0]), 
+        ("CC_discharge", [-1000, 3600, 0, 0, 0]), 
+        ("Rest", [600, 0, 0, 0, 0]), 
+        ("CC_charge", [1000, 3600, 10000, 0, 0]), 
+        ("Rest", [600, 0, 0, 0, 0]), 
+        ("Loop", [2, 0, 0, 0, 0]), 
+        ("Stop", [0, 0, 0, 0, 0]), 
+        ]
+
+# the records of an NDA file. the initial rest is step 1, then each cycle goes through steps 2 to 5. every
+# invalid_every-th record (if given) is marked invalid, as the parser must drop these
+def ndaRecords(rows, cycles = 10, seed = 0, invalid_every = 0):
+    rng = np.random.default_rng(seed)
+    num_segments = 4 * cycles + 1
+    segment = np.arange(rows) * num_segments // rows
+    starts = (np.arange(num_segments) * rows + num_segments - 1) // num_segments
+    Ns = np.where(segment == 0, 1, (segment - 1) % 4 + 2)
+    step_types = np.array([BTSff.BTS_STEP_TYPES.index(step_type) for step_type, parameters in NDA_STEPS])
+    records = np.zeros(rows, dtype = BTSff.BTS_RECORD_INFO)
+    records["record_no"] = np.arange(rows) + 1
+    records["cycle number"] = np.maximum(segment - 1, 0) // 4
+    records["Ns"] = Ns
+    records["mode"] = step_types[Ns - 1]
+    records["step_time"] = np.arange(rows) - starts[segment] + 1
+    records["Ewe"] = 35000 + rng.integers(-500, 500, rows)
+    current = np.where(records["mode"] == BTSff.BTS_STEP_TYPES.index("CC_discharge"), -1000, np.where(records["mode"] == BTSff.BTS_STEP_TYPES.index("CC_charge"), 1000, 0))
+    records["current"] = current
+    records["temperature"] = 25000
+    records["Q charge/discharge"] = np.abs(current) * records["step_time"]
+    records["Energy charge/discharge"] = records["Q charge/discharge"] * 35 // 10
+    records["clock_time"] = 1700000000 + np.arange(rows)
+    if invalid_every > 0:
+        records["status"][:: invalid_every] = BTSff.STATUS_SUCCESS + 1
+        
+    return records
+
+# writes an NDA file with rows records. returns the records written
+def writeNDA(fileName, rows, cycles = 10, seed = 0, invalid_every = 0):
+    records = ndaRecords(rows, cycles, seed, invalid_every)
+    header = bytearray(NDA_HEADER_SIZE)
+    header[: len(BTSff.FILE_HEADER)] = BTSff.FILE_HEADER
+    header[len(BTSff.FILE_HEADER): len(BTSff.FILE_HEADER) + 8] = b"20261018"
+    header[BTSff.BTS_VERSION_STRING_OFFS: BTSff.BTS_VERSION_STRING_OFFS + 9] = b"BTS 7.6.0"
+    header[BTSff.CHANNEL_INFO_OFFS: BTSff.CHANNEL_INFO_OFFS + 2] = b"\x03\x02"
+    header[BTSff.USERNAME_OFFS: BTSff.USERNAME_OFFS + 4] = b"Kyle"
+    for i, (step_type, parameters) in enumerate(NDA_STEPS):
+        header += struct.pack("<BB5i", i + 1, BTSff.BTS_STEP_TYPES.index(step_type), *parameters)
+        
+    with open(fileName, "wb") as f:
+        f.write(bytes(header))
+        f.write(records.tobytes())
+        
+    return records
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:45 2026
+
+@author: Kyle
+"""
+
+# this module now lives in the vmpff package, as vmpff.general.batch. it stands in for it when this directory is put
+# on the module search path, as in earlier versions, so that such scripts keep working with a copy of the repository
+import os
+import sys
+import importlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.modules[__name__] = importlib.import_module("vmpff.general.batch")
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:31:09 2026
+
+@author: Kyle
+"""
+
+# this module now lives in the vmpff package, as vmpff.general.instrumentation. it stands in for it when this
+# directory is put on the module search path, as in earlier versions, so that such scripts keep working with a copy of
+# the repository
+import os
+import sys
+import importlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.modules[__name__] = importlib.import_module("vmpff.general.instrumentation")
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:05:43 2026
+
+@author: Kyle
+"""
+
+# the vmpff command, run in this process
+
+import os
+import sys
+import subprocess
+
+import synthetic
+from vmpff.general import cli
+from vmpff.general import export
+
+# files of the same name in two directories are exported as two cells, named after their paths
+def test_convert_same_names(tmp_path):
+    rows = {"a": 5000, "b": 7000}
+    for directory, n in rows.items():
+        os.makedirs(tmp_path / directory)
+        synthetic.writeMPR(str(tmp_path / directory / "cell.mpr"), n)
+        
+    output = str(tmp_path / "out")
+    assert cli.main(["convert", str(tmp_path / "a"), str(tmp_path / "b"), "-o", output, "--workers", "1"]) == 0
+    assert export.listCells(output) == ["a_cell", "b_cell"]
+    for directory, n in rows.items():
+        metadata, dataframe = export.readExport(output, "%s_cell" % (directory))
+        assert len(dataframe) == n
+        
+# files that would still be exported as the same cell are refused before any is converted
+def test_convert_duplicate_cells(tmp_path, capsys):
+    synthetic.writeMPR(str(tmp_path / "cell.mpr"), 5000)
+    synthetic.writeNDA(str(tmp_path / "cell.nda"), 5000)
+    output = str(tmp_path / "out")
+    assert cli.main(["convert", str(tmp_path), "-o", output, "--workers", "1"]) == 2
+    assert not os.path.exists(output)
+    assert "exported as cell cell" in capsys.readouterr().err
+    
+# a single file keeps the name of the file
+def test_convert_cell_name(tmp_path):
+    synthetic.writeMPR(str(tmp_path / "cell.mpr"), 5000)
+    assert cli.cellNames([str(tmp_path / "cell.mpr")]) == {str(tmp_path / "cell.mpr"): "cell"}
+    
+# importing the command-line interface and running info import no pandas, which info never needs. this runs in a
+# fresh interpreter, as the tests themselves import pandas
+def test_info_without_pandas(tmp_path):
+    synthetic.writeMPR(str(tmp_path / "cell.mpr"), 1000)
+    synthetic.writeNDA(str(tmp_path / "cell.nda"), 1000)
+    probe = "import sys; from vmpff.general import cli; assert cli.main(sys.argv[1: ]) == 0; assert 'pandas' not in sys.modules"
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    subprocess.run([sys.executable, "-c", probe, "info", str(tmp_path), "--workers", "1"], cwd = root, check = True, capture_output = True)
+    
\ No newline at end of file
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:41:26 2026
+
+@author: Kyle
+"""
+
+# loading some columns of MPR files that lack some of the columns the segment index is built from
+
+import pytest
+import numpy as np
+
+import synthetic
+from vmpff.general import export
+from vmpff.biologic import cycle_metrics
+
+ROWS = 5000
+CYCLES = 6
+# time, Ewe, Q-Q0 and Ns, without half cycle or mode
+NO_INDEX_CODES = [4, 6, 0xd, 0x83]
+# the same, with half cycle but without mode
+NO_MODE_CODES = [4, 6, 0xd, 0x83, 0x1d4]
+
+def writeFile(tmp_path, codes):
+    fileName = str(tmp_path / "cell.mpr")
+    synthetic.writeMPR(fileName, ROWS, codes = codes, cycles = CYCLES)
+    return fileName
+
+def test_columns_without_index_columns(tmp_path):
+    fileName = writeFile(tmp_path, NO_INDEX_CODES)
+    full = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    full.fromFile(fileName)
+    r = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    r.fromFile(fileName, columns = ["time", "Ewe"])
+    assert list(r.measurement_sequence.columns) == ["time", "Ewe", "Ns"]
+    for name in r.measurement_sequence.columns:
+        np.testing.assert_array_equal(r.measurement_sequence[name], full.measurement_sequence[name])
+        
+    r.exportFile(fileName, str(tmp_path / "export"), "cell", columns = ["Ewe"])
+    metadata, exported = export.readExport(str(tmp_path / "export"), "cell")
+    assert list(exported.columns) == ["Ewe", "Ns"]
+    r.follow(fileName, columns = ["Q-Q0"])
+    assert list(r.measurement_sequence.columns) == ["Q-Q0", "Ns"]
+    
+# without a mode column, no row is taken as resting, so a half cycle is the same with or without rest
+@pytest.mark.parametrize("include_rest", [False, True])
+def test_half_cycle_without_mode(tmp_path, include_rest):
+    fileName = writeFile(tmp_path, NO_MODE_CODES)
+    r = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    r.fromFile(fileName, columns = ["Ewe", "Q-Q0"])
+    assert list(r.measurement_sequence.columns) == ["Ewe", "Q-Q0", "Ns", "half cycle"]
+    dataframe = r.measurement_sequence
+    expected = dataframe.index[(dataframe["Ns"] == 1) & (dataframe["half cycle"] == 0)]
+    assert len(expected) > 0
+    np.testing.assert_array_equal(r.getCycleDataIdx_hc(1, 0, include_rest), expected)
+    
+    
\ No newline at end of file
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:02:51 2026
+
+@author: Kyle
+"""
+
+# compact mode narrows the measured values and counters only: the accumulated columns keep full precision
+
+import numpy as np
+
+import synthetic
+from vmpff.biologic import VMPff
+from vmpff.mticyc import BTSff
+
+ROWS = 50000
+CYCLES = 40
+# columns accumulated over a step or over the whole experiment
+NDA_ACCUMULATED = ["time", "Q-Q0", "Q charge/discharge", "Energy charge/discharge"]
+MPR_ACCUMULATED = ["time", "Q-Q0", "Energy charge", "Energy discharge"]
+# integer fields of NDA records other than the counters, which are narrowed as well
+NDA_INTEGERS = ["step_time", "temperature", "clock_time"]
+
+def assertCompact(full, compact, accumulated, measured, integers = []):
+    assert list(compact.columns) == list(full.columns)
+    for name in accumulated:
+        assert compact[name].dtype == np.float64, name
+        np.testing.assert_array_equal(compact[name], full[name])
+        
+    for name in measured:
+        assert compact[name].dtype == np.float32, name
+        np.testing.assert_allclose(compact[name], full[name], rtol = 1E-6)
+        
+    for name in integers:
+        assert compact[name].dtype.kind in "iu" and compact[name].dtype.itemsize < full[name].dtype.itemsize, name
+        np.testing.assert_array_equal(compact[name], full[name])
+        
+    return
+
+def test_compact_nda(tmp_path):
+    fileName = str(tmp_path / "cell.nda")
+    synthetic.writeNDA(fileName, ROWS, cycles = CYCLES)
+    full = BTSff.fromFile(fileName)[2]
+    assertCompact(full, BTSff.fromFile(fileName, compact = True)[2], NDA_ACCUMULATED, ["Ewe", "current"], NDA_INTEGERS)
+    # a range of records is accumulated from the running totals before it
+    rows = (ROWS // 3, 2 * ROWS // 3)
+    assertCompact(BTSff.fromFile(fileName, rows = rows)[2], BTSff.fromFile(fileName, rows = rows, compact = True)[2], NDA_ACCUMULATED, ["Ewe", "current"], NDA_INTEGERS)
+    # as is a time window
+    time_range = (1000., 20000.)
+    assertCompact(BTSff.fromFile(fileName, time_range = time_range)[2], BTSff.fromFile(fileName, time_range = time_range, compact = True)[2], NDA_ACCUMULATED, ["Ewe", "current"], NDA_INTEGERS)
+    
+def test_compact_mpr(tmp_path):
+    fileName = str(tmp_path / "cell.mpr")
+    synthetic.writeMPR(fileName, ROWS, cycles = CYCLES)
+    full = VMPff.fromFile(fileName)[1].getDataFrame()
+    compact = VMPff.fromFile(fileName, compact = True)[1].getDataFrame()
+    assertCompact(full, compact, MPR_ACCUMULATED, ["Ewe", "control I", "dq"])
+    
\ No newline at end of file
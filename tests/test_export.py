@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+@author: Kyle
+"""
+
+# round trips of the columnar export: a file exported with exportFile and read back with fromExport must give the
+# same measurement sequence as fromFile, in every format
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import synthetic
+from vmpff.general import export
+from vmpff.biologic import cycle_metrics as biologic_cycle_metrics
+from vmpff.mticyc import cycle_metrics as mticyc_cycle_metrics
+
+ROWS = 20000
+CYCLES = 150
+# records decoded at a time, small enough that partitions span several chunks
+CHUNK_ROWS = 1500
+# soft limit on open files while exporting, below the number of partitions of the file with one half cycle each
+FD_LIMIT = 128
+
+FORMAT_MODULES = {
+        "parquet": "pyarrow", 
+        "arrow": "pyarrow", 
+        "hdf5": "tables", 
+        }
+        
+@pytest.fixture(scope = "module")
+def files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("export")
+    r = {
+            "MPR": (str(directory / "cell.mpr"), lambda: biologic_cycle_metrics.BiologicMODE1CyclingExperiment(1.)), 
+            "NDA": (str(directory / "cell.nda"), lambda: mticyc_cycle_metrics.MTICycMODE1CyclingExperiment(1.)), 
+            }
+    synthetic.writeMPR(r["MPR"][0], ROWS, cycles = CYCLES)
+    synthetic.writeNDA(r["NDA"][0], ROWS, cycles = CYCLES, invalid_every = 97)
+    return r
+
+def loadFile(files, fileType):
+    fileName, experiment = files[fileType]
+    r = experiment()
+    r.fromFile(fileName)
+    return r.measurement_sequence
+
+def exportAndRead(files, fileType, rootDir, fmt, half_cycles = None, **options):
+    fileName, experiment = files[fileType]
+    experiment().exportFile(fileName, str(rootDir), "cell", rows = CHUNK_ROWS, fmt = fmt, **options)
+    r = experiment()
+    r.fromExport(str(rootDir), "cell", half_cycles = half_cycles)
+    return r.measurement_sequence
+
+def assertSameRows(exported, expected):
+    pd.testing.assert_frame_equal(exported, expected, check_index_type = False)
+    return
+
+@pytest.mark.parametrize("fileType", ["MPR", "NDA"])
+@pytest.mark.parametrize("fmt", list(export.FORMATS))
+def test_round_trip(files, fileType, fmt, tmp_path):
+    pytest.importorskip(FORMAT_MODULES[fmt])
+    assertSameRows(exportAndRead(files, fileType, tmp_path, fmt), loadFile(files, fileType))
+    
+# a partition for every half cycle, with fewer files allowed open than there are partitions: the writer of each
+# partition must be closed before the next one is opened
+@pytest.mark.parametrize("fmt", list(export.FORMATS))
+def test_more_partitions_than_open_files(files, fmt, tmp_path):
+    pytest.importorskip(FORMAT_MODULES[fmt])
+    resource = pytest.importorskip("resource")
+    expected = loadFile(files, "MPR")
+    assert expected["half cycle"].nunique() > FD_LIMIT
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(FD_LIMIT, hard), hard))
+    try:
+        fileName, experiment = files["MPR"]
+        experiment().exportFile(fileName, str(tmp_path), "cell", rows = CHUNK_ROWS, fmt = fmt, halfCycles = 1)
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        
+    assert len(export.listPartitions(str(tmp_path), "cell", fmt)) == expected["half cycle"].nunique()
+    r = experiment()
+    r.fromExport(str(tmp_path), "cell")
+    assertSameRows(r.measurement_sequence, expected)
+    
+@pytest.mark.parametrize("fileType", ["MPR", "NDA"])
+@pytest.mark.parametrize("fmt", list(export.FORMATS))
+def test_half_cycle_range(files, fileType, fmt, tmp_path):
+    pytest.importorskip(FORMAT_MODULES[fmt])
+    expected = loadFile(files, fileType)
+    # a range that starts and stops within partitions
+    first, last = 25, 107
+    half_cycle = np.asarray(expected["half cycle"])
+    assertSameRows(exportAndRead(files, fileType, tmp_path, fmt, half_cycles = (first, last), halfCycles = 20), expected.loc[(half_cycle >= first) & (half_cycle < last)])
+    
+# rows coming back to a partition after another one was started go to another part file of it
+def test_partition_revisited(tmp_path):
+    pytest.importorskip("pyarrow")
+    dataframe = pd.DataFrame({"half cycle": [0, 0, 1, 1, 0, 2], "time": np.arange(6, dtype = float)})
+    with export.PartitionWriter(str(tmp_path), "cell", halfCycles = 1) as writer:
+        writer.write(dataframe.iloc[: 4])
+        writer.write(dataframe.iloc[4: ])
+        
+    assert [first for first, path in export.listPartitions(str(tmp_path), "cell", "parquet")] == [0, 0, 1, 2]
+    metadata, r = export.readExport(str(tmp_path), "cell")
+    assertSameRows(r, dataframe)
+    
\ No newline at end of file
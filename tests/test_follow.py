@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:03:51 2026
+
+@author: Kyle
+"""
+
+# following an MPR file while it is written: after every update(), the measurement sequence, its segment index and
+# its step summary must be the same as those of the file parsed as a whole
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import synthetic
+from vmpff.general import cycle_tools
+from vmpff.biologic import VMPff
+from vmpff.biologic import cycle_metrics
+
+ROWS = 30000
+CYCLES = 40
+# records written by the time of each update, the last one being the whole experiment
+WRITTEN = [20, 21, 21, 1500, 1501, 9000, 17777, ROWS]
+
+# the bytes of the MPR file after written records. with partial set, the header already counts the next record,
+# of which only half has been written
+def fileContents(scratch, version, written, partial = False):
+    records = synthetic.writeMPR(scratch, ROWS, version, cycles = CYCLES, written = written + partial)
+    with open(scratch, "rb") as f:
+        contents = f.read()
+        
+    if partial:
+        # the extra record version 1101 writes after the last one is not there yet either
+        recordSize = records.dtype.itemsize
+        contents = contents[: len(contents) - recordSize * (1 + (version == 1101)) + recordSize // 2]
+        
+    return contents
+
+# writes the file in place over what was there, so that it only grows, as an instrument writes it
+def growFile(fileName, contents):
+    with open(fileName, "r+b") as f:
+        f.write(contents)
+        
+    return
+
+def loadFile(fileName):
+    r = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    r.fromFile(fileName)
+    return r
+
+def assertSameIndex(index, expected):
+    assert index.size == expected.size
+    np.testing.assert_array_equal(index.starts, expected.starts)
+    np.testing.assert_array_equal(index.stops, expected.stops)
+    for keyColumn, expectedKeys in zip(index.keys, expected.keys):
+        np.testing.assert_array_equal(keyColumn, expectedKeys)
+        
+    assert index.runs == expected.runs
+    return
+
+@pytest.mark.parametrize("version", VMPff.ACCEPTED_VERSIONS)
+def test_follow_growing_file(version, tmp_path):
+    fileName, scratch = str(tmp_path / "growing.mpr"), str(tmp_path / "scratch.mpr")
+    with open(fileName, "wb") as f:
+        f.write(fileContents(scratch, version, WRITTEN[0], partial = True))
+        
+    experiment = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    experiment.follow(fileName)
+    assert len(experiment.measurement_sequence) == WRITTEN[0]
+    # built now, so that updates extend them
+    index = experiment.getSegmentIndex()
+    experiment.getStepSummary()
+    for previous, written in zip(WRITTEN[: -1], WRITTEN[1: ]):
+        # until the last update, the file ends in a record that is still being written
+        growFile(fileName, fileContents(scratch, version, written, partial = written < ROWS))
+        assert experiment.update() == written - previous
+        # the same records, written as a complete file
+        synthetic.writeMPR(scratch, ROWS, version, cycles = CYCLES, written = written)
+        expected = loadFile(scratch)
+        pd.testing.assert_frame_equal(experiment.measurement_sequence, expected.measurement_sequence)
+        assertSameIndex(experiment.getSegmentIndex(), expected.getSegmentIndex())
+        pd.testing.assert_frame_equal(experiment.getStepSummary(), expected.getStepSummary())
+        
+    assert experiment.getSegmentIndex() is index
+    expected = loadFile(fileName)
+    pd.testing.assert_frame_equal(experiment.measurement_sequence, expected.measurement_sequence)
+    pd.testing.assert_frame_equal(experiment.calculate_CE_table(), expected.calculate_CE_table())
+    
+# measurement sequences built up by ColumnBuffer keep their rows, whatever is appended afterwards
+def test_column_buffer():
+    dataframe = pd.DataFrame({"a": np.arange(10000), "b": np.linspace(0., 1., 10000, dtype = np.float32)})
+    buffer = cycle_tools.ColumnBuffer(dataframe.iloc[: 10])
+    frames = [buffer.getFrame()]
+    for stop in [11, 500, 5000, 10000]:
+        buffer.append(dataframe.iloc[len(frames[-1]): stop])
+        frames.append(buffer.getFrame())
+        
+    for frame in frames:
+        pd.testing.assert_frame_equal(frame, dataframe.iloc[: len(frame)], check_index_type = False)
+        
\ No newline at end of file
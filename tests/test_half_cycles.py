@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:48:12 2026
+
+@author: Kyle
+"""
+
+# voltage versus capacity of many half cycles at once, against stitching them one at a time
+
+import pytest
+import numpy as np
+
+import synthetic
+from vmpff.biologic import cycle_metrics
+
+ROWS = 20000
+CYCLES = 12
+
+@pytest.fixture(scope = "module")
+def experiment(tmp_path_factory):
+    fileName = str(tmp_path_factory.mktemp("half_cycles") / "cell.mpr")
+    synthetic.writeMPR(fileName, ROWS, cycles = CYCLES)
+    r = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    r.fromFile(fileName)
+    return r
+
+def stitched(experiment, keys, **kwargs):
+    return experiment.stitchHalfCycles([experiment.VvsCapacity_hc(*key) for key in keys], **kwargs)
+
+# both stitch the half cycles back to back by default, and separate them by a row of NaN with add_breaks set
+@pytest.mark.parametrize("add_breaks", [None, False, True])
+def test_stitch_half_cycles(experiment, add_breaks):
+    keys = list(experiment.getHalfCycleTable().index)
+    kwargs = dict() if add_breaks is None else {"add_breaks": add_breaks}
+    r = experiment.VvsCapacity_hcs(keys, **kwargs)
+    expected = stitched(experiment, keys, **kwargs)
+    assert len(r) == len(expected)
+    for name in ["capacity", "voltage"]:
+        np.testing.assert_allclose(np.asarray(r[name], dtype = float), np.asarray(expected[name], dtype = float), equal_nan = True)
+        
+    assert np.count_nonzero(np.isnan(np.asarray(r["voltage"]))) == (len(keys) - 1 if add_breaks else 0)
+    
+    
\ No newline at end of file
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:37:08 2026
+
+@author: Kyle
+"""
+
+# identifying the software version of MPR files. the only files at hand are the synthetic ones, so these tests check
+# that each layout the parser reads is told apart from the others, and that sniffFile refuses a file matching none
+# of them, which is otherwise read as of the default version; they do not show that EC-Lab writes files in these
+# layouts
+
+import pytest
+import numpy as np
+
+import synthetic
+from vmpff.biologic import VMPff
+from vmpff.biologic import cycle_metrics
+
+ROWS = 1000
+
+@pytest.mark.parametrize("version", VMPff.ACCEPTED_VERSIONS)
+def test_sniff(version, tmp_path):
+    fileName = str(tmp_path / "cell.mpr")
+    synthetic.writeMPR(fileName, ROWS, version = version)
+    assert VMPff.sniffFile(fileName) == version
+    x, y = VMPff.fromFile(fileName)
+    assert y.softVersion == version
+    assert len(y.getDataFrame()) == ROWS
+    
+# a data section header of a size no known version writes. sniffFile refuses to identify such a file, while reading it
+# takes it to be of the version files were read as before versions were identified: 1146, or 1152 for wide headers
+@pytest.mark.parametrize("version", VMPff.ACCEPTED_VERSIONS)
+def test_sniff_unknown_layout(version, tmp_path, monkeypatch):
+    fileName = str(tmp_path / "cell.mpr")
+    with monkeypatch.context() as m:
+        m.setitem(VMPff.DATA_HEADER_SIZE, version, VMPff.DATA_HEADER_SIZE[version] + 16)
+        synthetic.writeMPR(fileName, ROWS, version = version)
+        
+    with pytest.raises(AssertionError, match = "pass it explicitly"):
+        VMPff.sniffFile(fileName)
+        
+    fallback = 1152 if version == 1152 else 1146
+    assert VMPff.openFile(fileName).version == fallback
+    # the records are located from the size of the data section, so the file reads as it did with the default version
+    reference = str(tmp_path / "reference.mpr")
+    synthetic.writeMPR(reference, ROWS, version = version)
+    expected = VMPff.fromFile(fileName, fallback)[1].getDataFrame()
+    np.testing.assert_array_equal(VMPff.fromFile(fileName)[1].getDataFrame()["Q-Q0"], expected["Q-Q0"])
+    experiment = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    experiment.fromFile(fileName)
+    np.testing.assert_array_equal(experiment.measurement_sequence["Q-Q0"], expected["Q-Q0"])
+    if version != 1101:
+        np.testing.assert_array_equal(expected["Q-Q0"], VMPff.fromFile(reference)[1].getDataFrame()["Q-Q0"])
+        
+        
\ No newline at end of file
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:20:36 2026
+
+@author: Kyle
+"""
+
+# the step summary of a measurement sequence, for files with and without cycle numbers
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import synthetic
+from vmpff.general import cycle_tools
+from vmpff.biologic import cycle_metrics
+
+ROWS = 20000
+CYCLES = 12
+FIRST, LAST = 0, -1
+
+def loadMPR(tmp_path, codes):
+    fileName = str(tmp_path / "cell.mpr")
+    synthetic.writeMPR(fileName, ROWS, codes = codes, cycles = CYCLES)
+    r = cycle_metrics.BiologicMODE1CyclingExperiment(1.)
+    r.fromFile(fileName)
+    return r
+
+# the summary of every step, one at a time from its rows (and the last row of the step before)
+def expectedSummary(dataframe, keys):
+    Q, V = np.asarray(dataframe["Q-Q0"], dtype = float), np.asarray(dataframe["Ewe"], dtype = float)
+    keyColumns = np.stack([np.asarray(dataframe[key]) for key in keys], axis = 1)
+    boundaries = np.flatnonzero(np.any(keyColumns[1: ] != keyColumns[: -1], axis = 1)) + 1
+    rows = []
+    for first, stop in zip(np.concatenate([[0], boundaries]), np.append(boundaries, len(dataframe))):
+        Q_step = np.concatenate([[Q[first - 1] if first > 0 else 0.], Q[first: stop]])
+        V_step = np.concatenate([[V[first - 1] if first > 0 else V[first]], V[first: stop]])
+        rows.append({
+                "first": first, 
+                "last": stop - 1, 
+                "charge": Q_step[LAST] - Q_step[FIRST], 
+                "energy": np.sum(0.5 * (V_step[1: ] + V_step[: -1]) * np.diff(Q_step)), 
+                })
+        
+    return pd.DataFrame(rows)
+
+@pytest.mark.parametrize("codes", [synthetic.MPR_CYCLING_CODES, synthetic.MPR_DEFAULT_CODES])
+def test_step_summary(codes, tmp_path):
+    experiment = loadMPR(tmp_path, codes)
+    dataframe = experiment.measurement_sequence
+    keys = ["cycle number", "Ns"] if "cycle number" in dataframe.columns else ["Ns"]
+    assert cycle_tools.stepKeys(dataframe) == keys
+    summary = experiment.getStepSummary()
+    assert list(summary.columns[: len(keys)]) == keys
+    expected = expectedSummary(dataframe, keys)
+    np.testing.assert_array_equal(summary["first"], expected["first"])
+    np.testing.assert_array_equal(summary["last"], expected["last"])
+    np.testing.assert_allclose(summary["charge"], expected["charge"], rtol = 1E-12, atol = 1E-12)
+    np.testing.assert_allclose(summary["energy"], expected["energy"], rtol = 1E-9, atol = 1E-12)
+    
+# no charge is lost between steps: the charges of all steps add up to Q-Q0 at the last record, and each one is the
+# sum of dq over the rows of its step
+def test_step_charge_includes_first_row(tmp_path):
+    experiment = loadMPR(tmp_path, synthetic.MPR_DEFAULT_CODES)
+    dataframe = experiment.measurement_sequence
+    summary = experiment.getStepSummary()
+    assert np.isclose(summary["charge"].sum(), float(dataframe["Q-Q0"].iloc[LAST]))
+    dq = np.asarray(dataframe["dq"], dtype = float)
+    # the synthetic files charge at a constant current, so the first row of every step passes charge
+    assert np.all(dq[summary["first"].to_numpy()[summary["charge"].to_numpy() != 0.]] != 0.)
+    np.testing.assert_allclose(summary["charge"], cycle_tools.runSums(dq, summary["first"].to_numpy()), atol = 1E-9)
+    
+def test_step_summary_without_step():
+    with pytest.raises(AssertionError):
+        cycle_tools.stepSummary(pd.DataFrame({"time": [0.], "Q-Q0": [0.], "Ewe": [3.]}))
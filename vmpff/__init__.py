@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:58:24 2026
+
+@author: Kyle
+"""
+
+# the parsers and the tools built on them, as a package:
+#     vmpff.general     instrument-agnostic tools (cycle_tools, batch, cache, export, collection, cli, ...)
+#     vmpff.biologic    Biologic MPR files (VMPff, and cycle_metrics for the experiment classes)
+#     vmpff.mticyc      Neware NDA files written by MTI cyclers (BTSff, and cycle_metrics)
+# e.g.
+#     from vmpff.biologic import cycle_metrics
+# the modules import each other relative to the package, so that no generic module names (such as common) are
+# taken from, or added to, the module search path. importing vmpff alone imports none of them
+
+# the vmpff command (see general/cli.py)
+def main(argv = None):
+    from .general import cli
+    return cli.main(argv)
@@ -0,0 +1,708 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 28 11:23:15 2023
+
+@author: Kyle
+"""
+
+# imports
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import mmap
+import bisect
+
+from ..general import common
+from ..general import instrumentation
+
+# pandas is only imported once the first dataframe is built
+pd = common.LazyModule("pandas")
+
+# bump whenever a change to the parser changes its output, so that cached results are invalidated
+PARSER_VERSION = 1
+
+DATE_SIZE = 8
+MODULE_SN_SIZE = 10
+MODULE_LN_SIZE = 25
+
+# headers
+FILE_HEADER = b"BIO-LOGIC MODULAR FILE\x1a".ljust(0x30) + 4 * b"\x00"
+HEADER = b"MODULE"
+VMP_SET_SN = b"VMP Set".ljust(MODULE_SN_SIZE, b' ')
+VMP_SET_LN = b"VMP settings".ljust(MODULE_LN_SIZE, b' ')
+VMP_DATA_SN = b"VMP data".ljust(MODULE_SN_SIZE, b' ')
+VMP_DATA_LN = b"VMP data".ljust(MODULE_LN_SIZE, b' ')
+VMP_LOG_SN = b"VMP LOG".ljust(MODULE_SN_SIZE, b' ')
+VMP_LOG_LN = b"VMP LOG".ljust(MODULE_LN_SIZE, b' ')
+
+# byte value marking the beginning of the data stream
+DATA_SENTINEL = 0x01
+
+ACCEPTED_VERSIONS = [1101, 1146, 1152]
+# size of the data section header (record count and column codes, padded), by version
+DATA_HEADER_SIZE = {1101: 405, 1146: 405, 1152: 406}
+# field that is always -1 in the section headers of version 1152, which have a wider data size after it
+WIDE_HEADER_MARKER = 0xffffffff
+
+# attributes of a data column
+COL_NAME = 0
+COL_FMT = 1
+COL_SIZE = 2
+COL_FBIT = 3
+COL_FSIZE = 4
+VMP_DATA_FIELD_LIST = {
+        1: ("mode", *common.NONE_FIELD, 0, 2), 
+        2: ("ox/red", *common.NONE_FIELD, 2, 1), 
+        3: ("error", *common.NONE_FIELD, 3, 1), 
+        4: ("time", *common.DOUBLE, *common.NONE_FIELD), 
+        5: ("control I", *common.SINGLE, *common.NONE_FIELD), 
+        6: ("Ewe", *common.SINGLE, *common.NONE_FIELD), 
+        7: ("dq", *common.DOUBLE, *common.NONE_FIELD), 
+        0xd: ("Q-Q0", *common.DOUBLE, *common.NONE_FIELD), 
+        0x15: ("control change", *common.NONE_FIELD, 4, 1), 
+        0x18: ("cycle number", *common.DOUBLE, *common.NONE_FIELD), 
+        0x1f: ("Ns change", *common.NONE_FIELD, 5, 1), 
+        0x20: ("freq", *common.SINGLE, *common.NONE_FIELD), 
+        0x21: ("|Ewe|", *common.SINGLE, *common.NONE_FIELD), 
+        0x22: ("|I|", *common.SINGLE, *common.NONE_FIELD), 
+        0x23: ("angle(Z)", *common.SINGLE, *common.NONE_FIELD), 
+        0x24: ("|Z|", *common.SINGLE, *common.NONE_FIELD), 
+        0x25: ("Re(Z)", *common.SINGLE, *common.NONE_FIELD), 
+        0x26: ("-Im(Z)", *common.SINGLE, *common.NONE_FIELD), 
+        0x27: ("I range", *common.UINT16, *common.NONE_FIELD), 
+        0x41: ("counter change", *common.NONE_FIELD, 7, 1), 
+        0x46: ("P", *common.SINGLE, *common.NONE_FIELD), 
+        0x4c: ("<I>", *common.SINGLE, *common.NONE_FIELD), 
+        0x4d: ("<Ewe>", *common.SINGLE, *common.NONE_FIELD), 
+        0x7b: ("Energy charge", *common.DOUBLE, *common.NONE_FIELD), 
+        0x7c: ("Energy discharge", *common.DOUBLE, *common.NONE_FIELD), 
+        0x7d: ("Capacitance charge", *common.DOUBLE, *common.NONE_FIELD), 
+        0x7e: ("Capacitance discharge", *common.DOUBLE, *common.NONE_FIELD), 
+        0x83: ("Ns", *common.UINT16, *common.NONE_FIELD), 
+        0xa9: ("Cs", *common.SINGLE, *common.NONE_FIELD), 
+        0xac: ("Cp", *common.SINGLE, *common.NONE_FIELD), 
+        0x1b6: ("Step time", *common.DOUBLE, *common.NONE_FIELD), 
+        0x1d3: ("Q charge/discharge", *common.DOUBLE, *common.NONE_FIELD), 
+        0x1d4: ("half cycle", *common.UINT32, *common.NONE_FIELD), 
+        }
+
+REST_MODE = 3
+
+# below this number of records, the parallel decoder falls back to the vectorized one
+MP_MIN_ROWS = 1 << 16
+
+# counters, which take the narrowest integer type that holds them in compact mode
+COMPACT_COUNTERS = ["cycle number", "Ns", "half cycle"]
+# double precision columns of quantities measured afresh at each record (the charge passed since the previous
+# record), which are single precision in compact mode. the other double precision columns are accumulated and stay
+# double precision
+COMPACT_MEASURED = ["dq"]
+
+def parseVMPDataCode(code):
+    assert code in VMP_DATA_FIELD_LIST, "Unknown data code 0x%x" % (code)
+    return VMP_DATA_FIELD_LIST[code]
+
+def parseVMPDataPoint(dataBlock, columns, offsets):
+    assert len(columns) == len(offsets)
+    myPtr = common.pointer()
+    r = [0] * len(columns)
+    # read flags
+    flags = common.getField(dataBlock, myPtr, *common.UINT8)
+    for i, column in enumerate(columns):
+        if column[COL_FMT] is None:
+            # flag value
+            r[i] = common.getBitField(flags, column[COL_FBIT], column[COL_FSIZE])
+        else:
+            r[i] = common.getField(dataBlock, myPtr, column[COL_FMT], column[COL_SIZE])
+            
+    return r
+
+# state of a parallel decode worker, set up by initDecodeWorker
+decodeWorkerState = None
+
+def initDecodeWorker(fileName, sourceName, offset, record_dtype, columns, outputs):
+    global decodeWorkerState
+    blocks = [shared_memory.SharedMemory(name = blockName) for blockName, col_dtype in outputs]
+    if fileName is not None:
+        with open(fileName, "rb") as f:
+            source = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    else:
+        sourceBlock = shared_memory.SharedMemory(name = sourceName)
+        blocks.append(sourceBlock)
+        source = sourceBlock.buf
+        
+    decodeWorkerState = (source, offset, record_dtype, columns, [col_dtype for blockName, col_dtype in outputs], blocks)
+    return
+
+# decodes records [start, stop) into the shared output columns
+def decodeRecordRange(start, stop):
+    source, offset, record_dtype, columns, col_dtypes, blocks = decodeWorkerState
+    data = np.frombuffer(source, dtype = record_dtype, count = stop - start, offset = offset + start * record_dtype.itemsize)
+    for (name, fbit, fsize), col_dtype, block in zip(columns, col_dtypes, blocks):
+        column = np.frombuffer(block.buf, dtype = col_dtype, count = stop - start, offset = start * col_dtype.itemsize)
+        if fbit is None:
+            column[: ] = data[name]
+        else:
+            # flag value
+            column[: ] = common.getBitField(data["flags"], fbit, fsize)
+            
+    return stop - start
+
+# VMP sections -> Settings, Data, Log
+class VMPsection(object):
+    # initializes the object using header. the section starts at offset within datablock, which may
+    # be shared by all sections of the file (bytes, or a memoryview over a memory-mapped file)
+    def __init__(self, datablock, version, section_sn = None, section_ln = None, offset = 0):
+        assert version in ACCEPTED_VERSIONS, "Version %s not supported" % (version)
+        self.softVersion = version
+        ptr = common.pointer(offset)
+        common.checkField(datablock, ptr, HEADER)
+        if section_sn is not None and section_ln is not None:
+            common.checkField(datablock, ptr, section_sn)
+            common.checkField(datablock, ptr, section_ln)
+        else:
+            common.getRaw(datablock, ptr, MODULE_SN_SIZE)
+            common.getRaw(datablock, ptr, MODULE_LN_SIZE)
+            
+        # here, the different versions have different fields. for now, we try to guess which.
+        if self.softVersion == 1152:
+            # some field that is always -1
+            common.getField(datablock, ptr, *common.UINT32)
+            # read the next field as a qword integer
+            self.dataSize = common.getField(datablock, ptr, *common.UINT64)
+        else:
+            self.dataSize = common.getField(datablock, ptr, *common.UINT32)
+            
+        self.secVersion = common.getField(datablock, ptr, *common.UINT32)
+        # get the date string
+        self.date = str(common.getRaw(datablock, ptr, DATE_SIZE), "utf-8")
+        # data follows. if datablock is a memoryview, this is a view into the shared buffer, not a copy
+        self.dataOffset = ptr.getValue()
+        self.data = common.getRaw(datablock, ptr, self.dataSize)
+        # offset of the end of this section within datablock
+        self.end = ptr.getValue()
+        return
+    
+    def getEnd(self):
+        return self.end
+    
+    # views cannot be pickled, so we hand over a copy of the section data instead
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["data"] = bytes(self.data)
+        return state
+    
+class VMPsettings(VMPsection):
+    def __init__(self, datablock, version, offset = 0):
+        # pass to super
+        super(VMPsettings, self).__init__(datablock, version, VMP_SET_SN, VMP_SET_LN, offset)
+        # do something with the setting information
+        return
+    
+class VMPlog(VMPsection):
+    def __init__(self, datablock, version, offset = 0):
+        # pass to super
+        super(VMPlog, self).__init__(datablock, version, VMP_LOG_SN, VMP_LOG_LN, offset)
+        # do something with the log information
+        return
+    
+class VMPdata(VMPsection):
+    def __init__(self, datablock, version, offset = 0):
+        super(VMPdata, self).__init__(datablock, version, VMP_DATA_SN, VMP_DATA_LN, offset)
+        ptr = common.pointer()
+        # get the datafields
+        self.numDataPts = common.getField(self.data, ptr, *common.UINT32)
+        if self.softVersion == 1152:
+            self.numCols = common.getField(self.data, ptr, *common.UINT16)
+        else:
+            self.numCols = common.getField(self.data, ptr, *common.UINT8)
+            
+        self.colList = []
+        self.hasFlags = False
+        for i in range(self.numCols):
+            colData = parseVMPDataCode(common.getField(self.data, ptr, *common.UINT16))
+            self.colList.append(colData)
+            if colData[COL_FMT] is None:
+                self.hasFlags = True
+           
+        # the data sentinel will not always assume a fixed value, making this unreliable
+        '''
+        while common.getField(self.data, ptr, *common.UINT8) != DATA_SENTINEL:
+            continue
+            
+        '''
+        
+        # instead, we calculate the start of data based on the data size. assumes full blocks.
+        # first, create numpy ndarray data structure
+        self.record_spec = []
+        if self.hasFlags:
+            self.record_spec.append(("flags", np.uint8))
+            
+        for col in self.colList:
+            if col[COL_FMT] is None:
+                # flag value - skip
+                continue
+            else:
+                self.record_spec.append((col[COL_NAME], common.NP_TYPES[col[COL_FMT]]))
+                
+        # then, compute offsets
+        data_offs_rel_content_start = self.dataSize - self.numDataPts * np.dtype(self.record_spec).itemsize
+        if self.softVersion == 1101:
+            # there is a bug in this version where the last record is not transferred
+            ptr.setValue(data_offs_rel_content_start - np.dtype(self.record_spec).itemsize)
+        else:
+            ptr.setValue(data_offs_rel_content_start)
+            
+        self.ptr = ptr
+        # name of the file the section was read from, if any (set by fromFile)
+        self.fileName = None
+        # names of the columns to decode, or None for all of them (set by fromFile)
+        self.columns = None
+        # whether to compact the decoded columns (set by fromFile, see compactColumns)
+        self.compact = False
+        # whether to decode columns as read-only views into the section data rather than copies (set by fromFile)
+        self.views = False
+        # offset of the first record within the section data. unlike ptr, this is never moved
+        self.recordsOffset = ptr.getValue()
+        # [start, stop) range of the records to decode (set by selectRecords)
+        self.recordRange = (0, self.numDataPts)
+        return
+    
+    # restricts decoding to a range of records. rows is a (start, stop) pair, as for slicing (so (-1000, None) gives
+    # the last 1000 records), and time_range a (t0, t1) pair selecting the records with t0 <= time < t1; any bound
+    # may be None. the time column is monotonic, so the range is found by bisection, which reads only the handful of
+    # records it probes. returns the [start, stop) range of records selected
+    def selectRecords(self, rows = None, time_range = None):
+        start, stop = 0, self.numDataPts
+        if rows is not None:
+            start, stop, step = slice(*rows).indices(self.numDataPts)
+            stop = max(start, stop)
+            
+        if time_range is not None:
+            assert "time" in [name for name, fmt in self.record_spec], "Time range given, but there is no time column"
+            # a strided view of the times, read one at a time by bisect
+            times = self.getRecords()["time"]
+            t0, t1 = time_range
+            if t0 is not None:
+                start = bisect.bisect_left(times, t0, start, stop)
+                
+            if t1 is not None:
+                stop = bisect.bisect_left(times, t1, start, stop)
+                
+        self.recordRange = (start, stop)
+        return self.recordRange
+    
+    # returns records [start, stop) as a structured array. this is a view into the section data, not a copy
+    def getRecords(self, start = 0, stop = None):
+        if stop is None or stop > self.numDataPts:
+            stop = self.numDataPts
+            
+        start = min(start, stop)
+        record_dtype = np.dtype(self.record_spec)
+        return np.frombuffer(self.data, dtype = record_dtype, count = stop - start, offset = self.recordsOffset + start * record_dtype.itemsize)
+    
+    # names of the columns in the file, in the order they appear in it
+    def getColumnNames(self):
+        return [col[COL_NAME] for col in self.colList]
+    
+    # returns the columns to decode, in the order they appear in the file. columns is a list of column names, or
+    # None for the columns set on this section (all of them, by default)
+    def getColumns(self, columns = None):
+        if columns is None:
+            columns = self.columns
+            
+        if columns is None:
+            return self.colList
+        
+        names = self.getColumnNames()
+        for name in columns:
+            assert name in names, "Column %s not found in %s" % (name, ", ".join(names))
+            
+        return [col for col in self.colList if col[COL_NAME] in columns]
+    
+    # unpacks a structured array of records into a dictionary of columns. each column is read straight from its
+    # (strided) field of the records, so only the columns asked for are ever copied. with views set, the columns
+    # that are stored as such are not copied at all, but handed out as views of their fields
+    def decodeRecords(self, data, columns = None):
+        dataList = dict()
+        for col in self.getColumns(columns):
+            if col[COL_FMT] is None:
+                # flag value
+                dataList[col[COL_NAME]] = common.getBitField(data["flags"], col[COL_FBIT], col[COL_FSIZE])
+                
+            else:
+                dataList[col[COL_NAME]] = data[col[COL_NAME]] if self.views else np.array(data[col[COL_NAME]])
+                
+        return dataList
+    
+    # converts decoded columns to the least memory they fit in: flags to bool (or uint8, if more than one bit),
+    # counters to the narrowest integer type holding them, the measured columns (see COMPACT_MEASURED) to single
+    # precision and every other column to its type in the file, so that single precision values stay single precision
+    def compactColumns(self, dataList):
+        record_dtype = np.dtype(self.record_spec)
+        for col in self.colList:
+            if col[COL_NAME] not in dataList:
+                continue
+            
+            if col[COL_FMT] is None:
+                # flag value
+                dataList[col[COL_NAME]] = np.asarray(dataList[col[COL_NAME]], dtype = bool if col[COL_FSIZE] == 1 else np.uint8)
+            elif col[COL_NAME] in COMPACT_COUNTERS:
+                dataList[col[COL_NAME]] = common.narrowInteger(dataList[col[COL_NAME]])
+            elif col[COL_NAME] in COMPACT_MEASURED:
+                dataList[col[COL_NAME]] = np.asarray(dataList[col[COL_NAME]], dtype = np.float32)
+            else:
+                dataList[col[COL_NAME]] = np.asarray(dataList[col[COL_NAME]], dtype = record_dtype[col[COL_NAME]])
+                
+        return dataList
+    
+    # size of the records [start, stop) in bytes
+    def getRecordsSize(self, start = 0, stop = None):
+        if stop is None:
+            stop = self.numDataPts
+            
+        return (stop - start) * np.dtype(self.record_spec).itemsize
+    
+    def parse(self, columns = None):
+        self.dataList = {}
+        for col in self.getColumns(columns):
+            self.dataList[col[COL_NAME]] = []
+            
+        start, stop = self.recordRange
+        self.ptr.setValue(self.recordsOffset + self.getRecordsSize(0, start))
+        with instrumentation.stage("decode", mode = "Loop", rows = stop - start, bytes = self.getRecordsSize(start, stop)):
+            for i in range(start, stop):
+                # read flags
+                if self.hasFlags:
+                    flags = common.getField(self.data, self.ptr, *common.UINT8)
+                    
+                for col in self.colList:
+                    if col[COL_FMT] is None:
+                        # flag value
+                        value = common.getBitField(flags, col[COL_FBIT], col[COL_FSIZE])
+                    else:
+                        value = common.getField(self.data, self.ptr, col[COL_FMT], col[COL_SIZE])
+                        
+                    # every field must be read to get to the next one, but only the requested ones are kept
+                    if col[COL_NAME] in self.dataList:
+                        self.dataList[col[COL_NAME]].append(value)
+                        
+        return
+    
+    # version that takes advantage of numpy's frombuffer function
+    def parseVec(self, columns = None):
+        start, stop = self.recordRange
+        with instrumentation.stage("decode", mode = "Vec", rows = stop - start, bytes = self.getRecordsSize(start, stop)):
+            self.dataList = self.decodeRecords(self.getRecords(start, stop), columns)
+            
+        return
+    
+    # parallelized version. the records are split into contiguous row ranges, one per worker, and each worker
+    # decodes its range with numpy straight into preallocated columns in shared memory. the workers map the file
+    # itself if it is known, otherwise the records are first copied into a shared memory block
+    def parseMP(self, workers = None, columns = None):
+        if workers is None:
+            workers = mp.cpu_count()
+            
+        start, stop = self.recordRange
+        numRows = stop - start
+        if workers <= 1 or numRows < MP_MIN_ROWS:
+            # not worth spinning up a pool
+            self.parseVec(columns)
+            return
+        
+        record_dtype = np.dtype(self.record_spec)
+        numBytes = self.getRecordsSize(start, stop)
+        selected = self.getColumns(columns)
+        columns, outputs, blocks = [], [], []
+        try:
+            # offset of the first record to decode
+            first = self.recordsOffset + self.getRecordsSize(0, start)
+            if self.fileName is not None:
+                sourceName, offset = None, self.dataOffset + first
+            else:
+                source = shared_memory.SharedMemory(create = True, size = numBytes)
+                blocks.append(source)
+                source.buf[: numBytes] = self.data[first: first + numBytes]
+                sourceName, offset = source.name, 0
+                
+            # preallocate the output columns
+            for col in selected:
+                if col[COL_FMT] is None:
+                    # flag value
+                    columns.append((col[COL_NAME], col[COL_FBIT], col[COL_FSIZE]))
+                    col_dtype = np.dtype(np.uint8)
+                else:
+                    columns.append((col[COL_NAME], None, None))
+                    col_dtype = record_dtype[col[COL_NAME]]
+                    
+                block = shared_memory.SharedMemory(create = True, size = numRows * col_dtype.itemsize)
+                blocks.append(block)
+                outputs.append((block.name, col_dtype))
+                
+            bounds = np.linspace(0, numRows, workers + 1).astype(int)
+            with instrumentation.stage("decode", mode = "MP", workers = workers, rows = numRows, bytes = numBytes):
+                # start up a pool
+                with mp.Pool(workers, initializer = initDecodeWorker, initargs = (self.fileName, sourceName, offset, record_dtype, columns, outputs)) as pool:
+                    pool.starmap(decodeRecordRange, zip(bounds[: -1], bounds[1: ]))
+                    
+                # take the columns out of shared memory before releasing it
+                self.dataList = dict()
+                for (name, fbit, fsize), block, (blockName, col_dtype) in zip(columns, blocks[len(blocks) - len(outputs): ], outputs):
+                    self.dataList[name] = np.frombuffer(block.buf, dtype = col_dtype, count = numRows).copy()
+                    
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+                
+        return
+    
+    # columns is a list of the names of the columns to decode. by default, these are the columns given to
+    # fromFile (all of them, if none were). only the records selected by selectRecords are decoded, and the
+    # dataframe is indexed by record number. the decoded columns are not copied again into the dataframe
+    def getDataFrame(self, mp = False, workers = None, columns = None):
+        if mp == False:
+            # use the fastest parse mode
+            self.parseVec(columns)
+        else:
+            if mp == "MP":
+                self.parseMP(workers, columns)
+            elif mp == "Vec":
+                self.parseVec(columns)
+            else:
+                print("Warning: Unrecognized parse mode %s. Falling back to default parse method." % (mp))
+                self.parse(columns)
+                
+        start, stop = self.recordRange
+        with instrumentation.stage("dataframe", rows = stop - start, columns = len(self.dataList)):
+            if self.compact:
+                self.compactColumns(self.dataList)
+                
+            dataframe = pd.DataFrame(self.dataList, index = pd.RangeIndex(start, stop), copy = False)
+            
+        return dataframe
+    
+    # decodes the records in chunks of at most rows records, yielding a dataframe for each. the index
+    # continues across chunks, so concatenating all chunks gives the same result as getDataFrame()
+    def iterChunks(self, rows = common.CHUNK_ROWS, columns = None):
+        assert rows > 0, "Chunk size must be positive"
+        first, last = self.recordRange
+        for start in range(first, last, rows):
+            stop = min(start + rows, last)
+            with instrumentation.stage("decode", mode = "chunk", rows = stop - start, bytes = self.getRecordsSize(start, stop)):
+                dataList = self.decodeRecords(self.getRecords(start, stop), columns)
+                
+            with instrumentation.stage("dataframe", rows = stop - start, columns = len(dataList)):
+                if self.compact:
+                    # counters are narrowed chunk by chunk, so their type may differ between chunks
+                    self.compactColumns(dataList)
+                    
+                dataframe = pd.DataFrame(dataList, index = pd.RangeIndex(start, stop), copy = False)
+                
+            yield dataframe
+            
+        return
+    
+# section class of each known module, by short name. other modules are read as plain sections
+SECTION_CLASSES = {
+        VMP_SET_SN: VMPsettings, 
+        VMP_DATA_SN: VMPdata, 
+        VMP_LOG_SN: VMPlog, 
+        }
+# fields of a section directory entry
+SEC_SN = 0
+SEC_LN = 1
+SEC_OFFSET = 2
+SEC_SIZE = 3
+
+# walks the MODULE headers of a file from offset on, reading only their names and size fields, and returns a
+# (short name, long name, offset, data size) entry for every section. the walk stops at the end of the file, or after
+# a section running past it (such as the data section of a file that is still being written)
+def scanSections(contents, offset = len(FILE_HEADER)):
+    r = []
+    ptr = common.pointer(offset)
+    while ptr.getValue() + len(HEADER) <= len(contents):
+        start = ptr.getValue()
+        common.checkField(contents, ptr, HEADER)
+        sn = bytes(common.getRaw(contents, ptr, MODULE_SN_SIZE))
+        ln = bytes(common.getRaw(contents, ptr, MODULE_LN_SIZE))
+        dataSize = common.getField(contents, ptr, *common.UINT32)
+        if dataSize == WIDE_HEADER_MARKER:
+            dataSize = common.getField(contents, ptr, *common.UINT64)
+            
+        # skip the section version, the date and the data
+        ptr.add(common.LONG_SIZE + DATE_SIZE + dataSize)
+        r.append((sn, ln, start, dataSize))
+        
+    return r
+
+# the sections of a file, as found by scanSections. a section is only read when first asked for, so that e.g. the
+# settings or the log of a file can be read without touching its data. if version is None, it is identified from
+# the file (see sniffVersion)
+class VMPdirectory(object):
+    def __init__(self, contents, version = None, offset = len(FILE_HEADER)):
+        self.contents = contents
+        self.entries = scanSections(contents, offset)
+        self.version = version if version is not None else sniffVersion(contents, offset)
+        # sections read so far, by position in entries
+        self.sections = dict()
+        return
+    
+    def getNames(self):
+        return [str(entry[SEC_SN], "utf-8").rstrip() for entry in self.entries]
+    
+    # returns the position of the first section with the given short name (e.g. VMP_LOG_SN, or just b"VMP LOG"), or
+    # None if there is none
+    def findSection(self, sn):
+        sn = sn.ljust(MODULE_SN_SIZE, b" ")
+        for i, entry in enumerate(self.entries):
+            if entry[SEC_SN] == sn:
+                return i
+            
+        return None
+    
+    # returns the first section with the given short name, or None if there is none
+    def getSection(self, sn):
+        i = self.findSection(sn)
+        if i is None:
+            return None
+        
+        if i not in self.sections:
+            self.sections[i] = self.readSection(self.entries[i])
+            
+        return self.sections[i]
+    
+    def readSection(self, entry):
+        if entry[SEC_SN] in SECTION_CLASSES:
+            return SECTION_CLASSES[entry[SEC_SN]](self.contents, self.version, offset = entry[SEC_OFFSET])
+        
+        return VMPsection(self.contents, self.version, offset = entry[SEC_OFFSET])
+    
+# identifies the version of an MPR file from the headers of its settings and data sections alone, without decoding
+# any records. the section headers of version 1152 are marked by a field that is always -1, and version 1101 writes
+# an extra record after the last one, which shows as a data section header one record longer than usual. offset is
+# that of the settings section. the layouts (and DATA_HEADER_SIZE) have only been checked against the synthetic files
+# of Benchmarks/synthetic.py, which are written the way the parser reads them, and not against files written by
+# EC-Lab. a file that matches none of them is taken to be of the version files were read as before versions were
+# identified: 1146, or 1152 for the wider section headers only that version writes. with strict set, identifying such
+# a file fails instead (see sniffFile)
+def sniffVersion(contents, offset = len(FILE_HEADER), strict = False):
+    ptr = common.pointer(offset + len(HEADER) + MODULE_SN_SIZE + MODULE_LN_SIZE)
+    # versions 1101 and 1146 have the same section headers
+    candidates = [1152] if common.getField(contents, ptr, *common.UINT32) == WIDE_HEADER_MARKER else [1146, 1101]
+    y = VMPdirectory(contents, candidates[0], offset).getSection(VMP_DATA_SN)
+    assert y is not None, "No data section found"
+    for version in candidates:
+        if y.recordsOffset == DATA_HEADER_SIZE[version] + (np.dtype(y.record_spec).itemsize if version == 1101 else 0):
+            return version
+        
+    assert not strict, "Cannot identify the version of the file (data header of %d bytes matches none of versions %s); pass it explicitly, e.g. version = %d" % (y.recordsOffset, ", ".join(str(version) for version in candidates), candidates[0])
+    return candidates[0]
+
+# returns the section directory of a file. the file is mapped, so only the pages holding the sections that are read
+# are ever loaded
+def openFile(fileName, version = None):
+    ptr = common.pointer()
+    with open(fileName, "rb") as f:
+        contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+        
+    common.checkField(contents, ptr, FILE_HEADER)
+    return VMPdirectory(contents, version, ptr.getValue())
+
+# returns the version of an MPR file, reading only its headers. unlike reading the file without a version, this fails
+# for a file that matches none of the known layouts, rather than taking it to be of the default version (see
+# sniffVersion)
+def sniffFile(fileName):
+    ptr = common.pointer()
+    with open(fileName, "rb") as f:
+        contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+        
+    common.checkField(contents, ptr, FILE_HEADER)
+    return sniffVersion(contents, ptr.getValue(), strict = True)
+
+# all sections are views into a single buffer holding the file contents. with memmap set, the buffer
+# is a read-only memory map of the file, so only the pages that are actually decoded are ever loaded. columns
+# restricts the data section to the given list of column names, so that the others are never decoded. rows and
+# time_range restrict it to a range of records (see VMPdata.selectRecords). with memmap set, only the pages
+# holding these records are read. with compact set, the columns take as little memory as they fit in (see
+# VMPdata.compactColumns). with views set, the columns stored as such in the file are not decoded at all: the
+# dataframe holds read-only views straight into the file contents (or its memory map), which are kept alive for as
+# long as the dataframe is. if version is None, it is identified from the file (see sniffVersion)
+def fromFile(fileName, version = None, memmap = False, columns = None, rows = None, time_range = None, compact = False, views = False):
+    ptr = common.pointer()
+    with instrumentation.stage("header", file = fileName, memmap = memmap) as s:
+        with open(fileName, "rb") as f:
+            if memmap:
+                # the map stays open for as long as some section holds a view into it
+                contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+            else:
+                contents = memoryview(f.read())
+                
+        common.checkField(contents, ptr, FILE_HEADER)
+        s.set(bytes = len(contents))
+        
+    with instrumentation.stage("sections", file = fileName) as s:
+        directory = VMPdirectory(contents, version, ptr.getValue())
+        x = directory.getSection(VMP_SET_SN)
+        y = directory.getSection(VMP_DATA_SN)
+        assert x is not None and y is not None, "%s has no settings or no data section" % (fileName)
+        s.set(bytes = y.getEnd() - ptr.getValue(), rows = y.numDataPts, version = directory.version, sections = directory.getNames())
+        
+    y.fileName = fileName
+    y.columns = columns
+    y.compact = compact
+    y.views = views
+    y.selectRecords(rows, time_range)
+    return x, y
+
+# follows a file that is still being written by the instrument. each call to update() maps the file anew, reads
+# the record count in the data section header and decodes only the records appended since the previous call. columns
+# restricts the decoded columns, and version is as in fromFile
+class VMPfollower(object):
+    def __init__(self, fileName, version = None, columns = None):
+        self.fileName = fileName
+        self.version = version
+        self.columns = columns
+        self.settings = None
+        # offset of the data section within the file, found on the first update
+        self.dataOffset = None
+        # number of records decoded so far, the last record count read from the header and the file offset
+        # just past the last decoded record
+        self.numDecoded = 0
+        self.numDataPts = 0
+        self.end = None
+        return
+    
+    # returns a dataframe with the new records, indexed by record number
+    def update(self):
+        ptr = common.pointer()
+        with open(self.fileName, "rb") as f:
+            contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+            
+        if self.dataOffset is None:
+            common.checkField(contents, ptr, FILE_HEADER)
+            directory = VMPdirectory(contents, self.version, ptr.getValue())
+            self.version = directory.version
+            self.settings = directory.getSection(VMP_SET_SN)
+            i = directory.findSection(VMP_DATA_SN)
+            assert i is not None, "%s has no data section yet" % (self.fileName)
+            self.dataOffset = directory.entries[i][SEC_OFFSET]
+            
+        with instrumentation.stage("sections", file = self.fileName, bytes = len(contents)):
+            y = VMPdata(contents, self.version, offset = self.dataOffset)
+            
+        recordSize = np.dtype(y.record_spec).itemsize
+        # the header may already count records that have not been completely written yet
+        stop = min(y.numDataPts, (len(y.data) - y.recordsOffset) // recordSize)
+        assert stop >= self.numDecoded, "%s has fewer records than were already decoded, possibly rewritten" % (self.fileName)
+        with instrumentation.stage("decode", mode = "follow", rows = stop - self.numDecoded, bytes = y.getRecordsSize(self.numDecoded, stop)):
+            dataList = y.decodeRecords(y.getRecords(self.numDecoded, stop), self.columns)
+            
+        with instrumentation.stage("dataframe", rows = stop - self.numDecoded, columns = len(dataList)):
+            dataframe = pd.DataFrame(dataList, index = pd.RangeIndex(self.numDecoded, stop), copy = False)
+            
+        self.numDecoded = stop
+        self.numDataPts = y.numDataPts
+        self.end = y.dataOffset + y.recordsOffset + stop * recordSize
+        return dataframe
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:40:12 2026
+
+@author: Kyle
+"""
+
+# Biologic MPR files: the parser (VMPff), and the experiment classes built on it (cycle_metrics)
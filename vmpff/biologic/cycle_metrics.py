@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 28 13:02:41 2023
+
+@author: Kyle
+"""
+
+from . import VMPff
+import numpy as np
+
+from ..general import common
+from ..general import cycle_tools
+from ..general import export
+
+# columns the segment index is built from, which are decoded even if not asked for (if the file has them)
+INDEX_COLUMNS = ["Ns", "half cycle", "mode"]
+
+# the given list of column names (None for all of them) plus those of INDEX_COLUMNS that the data section y has
+def addIndexColumns(columns, y):
+    if columns is None:
+        return None
+    
+    names = y.getColumnNames()
+    return list(columns) + [name for name in INDEX_COLUMNS if name not in columns and name in names]
+
+# class representing experiments recorded by Biologic
+class BiologicExperiment(object):
+    def __init__(self, version = None, hc = 0):
+        # software version, or None to identify it from each file (see VMPff.sniffVersion)
+        self.version = version
+        self.hc = hc
+        self.follower = None
+        self.buffer = None
+        self.segment_index = None
+        return
+    
+    # instantiate fromFile. set memmap to map the file instead of reading it into memory. if a cache (see
+    # general/cache.py) is given, the parsed data are taken from it when the file has not changed since. columns
+    # restricts the measurement sequence to a list of column names (plus those of INDEX_COLUMNS the file has), so that
+    # the others are never decoded. rows (start, stop) and time_range (t0, t1) restrict it to a range of records (see
+    # VMPff.VMPdata.selectRecords), so that only these are decoded. set compact to hold the measurement sequence in as
+    # little memory as it fits in (see VMPff.VMPdata.compactColumns), and views to hold read-only views into the file
+    # (see VMPff.fromFile) rather than copies of its columns
+    def fromFile(self, fileName, memmap = False, cache = None, columns = None, rows = None, time_range = None, compact = False, views = False):
+        if cache is not None:
+            parser = ("VMPff", VMPff.PARSER_VERSION, self.version)
+            if columns is not None:
+                parser += (tuple(sorted(columns)), )
+                
+            if rows is not None or time_range is not None:
+                parser += (("rows", rows, "time_range", time_range), )
+                
+            if compact:
+                parser += ("compact", )
+                
+            key = cache.key(fileName, parser)
+            entry = cache.load(key)
+            if entry is not None:
+                self.metadata, self.measurement_sequence = entry
+                return
+            
+        x, y = VMPff.fromFile(fileName, self.version, memmap = memmap, columns = columns, rows = rows, time_range = time_range, compact = compact, views = views)
+        y.columns = addIndexColumns(columns, y)
+        self.metadata = [x]
+        # default to vectorized parsing, because it is FAST!
+        self.measurement_sequence = y.getDataFrame(mp = "Vec")
+        if cache is not None:
+            cache.store(key, self.metadata, self.measurement_sequence)
+            
+        return
+    
+    # export a file to partitioned columnar files (see general/export.py) as the given cell. the file is mapped and
+    # decoded a chunk of rows records at a time, so it is never held in memory as a whole. columns is as in fromFile,
+    # and options are passed on to export.PartitionWriter (e.g. fmt = "arrow"). the columns keep their full types,
+    # as compact mode would narrow counters differently from chunk to chunk; to export a compact measurement
+    # sequence, load it with fromFile and use export.exportExperiment
+    def exportFile(self, fileName, rootDir, cell, columns = None, rows = common.CHUNK_ROWS, **options):
+        x, y = VMPff.fromFile(fileName, self.version, memmap = True, columns = columns)
+        y.columns = addIndexColumns(columns, y)
+        self.metadata = [x]
+        with export.PartitionWriter(rootDir, cell, self.metadata, **options) as writer:
+            for chunk in y.iterChunks(rows):
+                writer.write(chunk)
+                
+        return
+    
+    # the half cycle table (see cycle_tools.GalvanostaticCyclingExperiment.streamHalfCycleTable) of a file, decoded a
+    # chunk of rows records at a time, so that only one chunk is ever held in memory. resting rows are left out, as
+    # in getHalfCycleExtents. the measurement sequence is left as it is. pass the result to calculate_CE_table for the
+    # Coulombic efficiencies
+    def streamFile(self, fileName, rows = common.CHUNK_ROWS):
+        x, y = VMPff.fromFile(fileName, self.version, memmap = True, columns = cycle_tools.STREAM_COLUMNS + ["mode"])
+        return self.streamHalfCycleTable(y.iterChunks(rows), VMPff.REST_MODE, self.hc)
+    
+    # instantiate from a cell written by exportFile (or export.exportExperiment). half_cycles is a [first, last)
+    # range of half cycles to read, in which case only the partitions holding these are read
+    def fromExport(self, rootDir, cell, half_cycles = None):
+        self.metadata, self.measurement_sequence = export.readExport(rootDir, cell, half_cycles)
+        return
+    
+    # instantiate from a file that is still being written. afterwards, update() adds any records that were
+    # appended to the file since, decoding only the new records. columns is as in fromFile
+    def follow(self, fileName, columns = None):
+        if columns is not None:
+            # only the headers are read, to find which of the index columns the file has
+            columns = addIndexColumns(columns, VMPff.openFile(fileName, self.version).getSection(VMPff.VMP_DATA_SN))
+            
+        self.follower = VMPff.VMPfollower(fileName, self.version, columns)
+        self.buffer = cycle_tools.ColumnBuffer(self.follower.update())
+        self.measurement_sequence = self.buffer.getFrame()
+        self.metadata = [self.follower.settings]
+        return
+    
+    # returns the number of new records. the new records are appended to column buffers (see
+    # cycle_tools.ColumnBuffer), and the segment index and step summary, if built, are extended with them, so that an
+    # update takes time in proportion to the new records rather than to the whole file
+    def update(self):
+        assert self.follower is not None, "No file is being followed"
+        new_data = self.follower.update()
+        if len(new_data) > 0:
+            previous = self.measurement_sequence
+            self.buffer.append(new_data)
+            self.measurement_sequence = self.buffer.getFrame()
+            if self.segment_index is not None and self.segment_index.source is previous:
+                self.segment_index.extend(self.measurement_sequence, self.getSegmentKeys(len(previous)))
+                
+            if getattr(self, "step_summary", None) is not None and self.step_summary_source is previous:
+                self.step_summary = cycle_tools.extendStepSummary(self.step_summary, self.measurement_sequence)
+                self.step_summary_source = self.measurement_sequence
+                
+        return len(new_data)
+    
+    # key columns of the segment index (step, half cycle and rest), for the rows from position start on. without a
+    # mode column, no row is taken as resting
+    def getSegmentKeys(self, start = 0):
+        Ns = np.asarray(self.measurement_sequence["Ns"])[start: ]
+        if "mode" in self.measurement_sequence.columns:
+            rest = np.asarray(self.measurement_sequence["mode"])[start: ] == VMPff.REST_MODE
+        else:
+            rest = np.zeros(len(Ns), dtype = bool)
+            
+        return [Ns, np.asarray(self.measurement_sequence["half cycle"])[start: ], rest]
+    
+    # index of the measurement sequence by step, half cycle and rest. it is built once for each measurement
+    # sequence, on first use
+    def getSegmentIndex(self):
+        if self.segment_index is None or self.segment_index.source is not self.measurement_sequence:
+            self.segment_index = cycle_tools.SegmentIndex(self.measurement_sequence, self.getSegmentKeys())
+            
+        return self.segment_index
+    
+    # row positions of a half cycle, as a list of [start, stop) spans
+    def getCycleSpans_hc(self, cycle, half_cycle, include_rest):
+        keys = [(cycle, self.hc + half_cycle, False)]
+        if include_rest:
+            keys.append((cycle, self.hc + half_cycle, True))
+            
+        return self.getSegmentIndex().spans(keys)
+    
+    def getHalfCycleExtents(self):
+        index = self.getSegmentIndex()
+        Ns, half_cycle, rest = index.keys
+        return cycle_tools.halfCycleExtents(Ns[~rest], half_cycle[~rest].astype(int) - self.hc, index.starts[~rest], index.stops[~rest])
+    
+    def getCycleDataIdx_hc(self, cycle, half_cycle, include_rest):
+        return self.measurement_sequence.index[cycle_tools.spanIndices(self.getCycleSpans_hc(cycle, half_cycle, include_rest))]
+    
+    def getCycleData_hc(self, cycle, half_cycle, include_rest):
+        return cycle_tools.sliceSpans(self.measurement_sequence, self.getCycleSpans_hc(cycle, half_cycle, include_rest))
+    
+    
+class BiologicMODE1CyclingExperiment(BiologicExperiment, cycle_tools.MODE1CyclingExperiment):
+    def __init__(self, area, version = None, hc = 0):
+        BiologicExperiment.__init__(self, version, hc)
+        cycle_tools.MODE1CyclingExperiment.__init__(self, area, REST = (0, 0), CYCLE_PLATING = (1, 0), CYCLE_STRIPPING = (2, 1))
+        return
+    
+    
+class BiologicPNNLCyclingExperiment(BiologicExperiment, cycle_tools.PNNLCyclingExperiment):
+    def __init__(self, area, version = None, hc = 0):
+        BiologicExperiment.__init__(self, version, hc)
+        cycle_tools.PNNLCyclingExperiment.__init__(self, area, REST = (0, 0), INITIAL_PLATING = (1, 0), INITIAL_STRIPPING = (2, 1), TEST_PLATING = (3, 2), SHORT_CYCLE_STRIPPING = (4, 3), SHORT_CYCLE_PLATING = (5, 4), TEST_STRIPPING = (6, 23), NUM_SHORT_CYCLES = 10)
+        return
+    
+    
\ No newline at end of file
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:40:12 2026
+
+@author: Kyle
+"""
+
+# instrument-agnostic tools: the binary helpers the parsers share (common), timing of the parsers
+# (instrumentation), cycling experiments (cycle_tools), batch loading (batch), caching (cache), columnar export
+# (export), many cells at once (collection), the command-line interface (cli) and helpers for figures (plotting)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:45 2026
+
+@author: Kyle
+"""
+
+import os
+import glob
+import functools
+import concurrent.futures
+
+from . import common
+
+# returns the list of files to load. inputs is a directory (of which all files containing the substring s are
+# taken), a glob pattern, or a list of either
+def collectInputs(inputs, s = ""):
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+        
+    fileNames = []
+    for item in inputs:
+        if os.path.isdir(item):
+            fileNames.extend(sorted(os.path.join(item, fname) for fname in common.collectFiles(item, s)))
+        elif glob.has_magic(str(item)):
+            fileNames.extend(sorted(fname for fname in glob.glob(str(item)) if os.path.isfile(fname)))
+        else:
+            fileNames.append(item)
+            
+    return fileNames
+
+# instantiates an experiment and loads it from a file. this runs in the worker processes
+def loadExperiment(experiment, fileName):
+    r = experiment()
+    r.fromFile(fileName)
+    return r
+
+# calls func on many files concurrently across a pool of worker processes. func takes a file name and must be
+# picklable (e.g. a module-level function, or a functools.partial of one). returns two dictionaries keyed by file
+# name: one of the results, and one of the exceptions raised by files that failed
+def mapFiles(func, fileNames, workers = None):
+    if workers is None:
+        workers = os.cpu_count()
+        
+    results, errors = dict(), dict()
+    if workers <= 1:
+        # run in this process, which is handy for debugging
+        for fileName in fileNames:
+            try:
+                results[fileName] = func(fileName)
+            except Exception as e:
+                errors[fileName] = e
+                
+        return results, errors
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        futures = {pool.submit(func, fileName): fileName for fileName in fileNames}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+                
+    # report in input order, regardless of which file finished first
+    results = {fileName: results[fileName] for fileName in fileNames if fileName in results}
+    errors = {fileName: errors[fileName] for fileName in fileNames if fileName in errors}
+    return results, errors
+
+# loads many files concurrently across a pool of worker processes. experiment is a callable that takes no arguments
+# and returns an experiment object to be filled by its fromFile() method, e.g. an experiment class or a
+# functools.partial of one; it must be picklable. returns two dictionaries keyed by file name: one of loaded
+# experiments, and one of the exceptions raised by files that could not be loaded
+def loadFiles(experiment, fileNames, workers = None):
+    return mapFiles(functools.partial(loadExperiment, experiment), fileNames, workers)
+
+# loads all matching files in a directory (or matching a glob pattern)
+def loadDirectory(experiment, inputFileDir, s = "", workers = None):
+    return loadFiles(experiment, collectInputs(inputFileDir, s), workers)
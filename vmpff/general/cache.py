@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:37 2026
+
+@author: Kyle
+"""
+
+import os
+import shutil
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+# default limit on the total size of a cache directory
+DEFAULT_MAX_BYTES = 20 << 30
+
+# name of the file holding the column list and metadata of an entry. its modification time doubles as the
+# last access time of the entry
+INFO_NAME = "info.pkl"
+COLUMN_NAME = "%d.npy"
+
+# on-disk cache of parsed files. each entry is a directory holding every column of the measurement sequence as a
+# .npy file, plus the pickled metadata. entries are keyed by the path, size and modification time of the source file,
+# and by the parser (and its version and options), so that a changed file or parser is never served from the cache.
+# when the cache grows beyond maxBytes, the least recently used entries are removed
+class ParseCache(object):
+    def __init__(self, cacheDir, maxBytes = DEFAULT_MAX_BYTES):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        os.makedirs(cacheDir, exist_ok = True)
+        return
+    
+    # parser identifies the parser and anything that changes its output, e.g. ("VMPff", VMPff.PARSER_VERSION, 1146)
+    def key(self, fileName, parser):
+        st = os.stat(fileName)
+        identity = repr((os.path.abspath(fileName), st.st_size, st.st_mtime_ns, parser))
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    
+    def entryDir(self, key):
+        return os.path.join(self.cacheDir, key)
+    
+    # returns (metadata, dataframe), or None if there is no entry. by default, the columns are memory-mapped
+    # copy-on-write, so loading costs next to nothing and the dataframe can still be modified
+    def load(self, key, memmap = True):
+        entryDir = self.entryDir(key)
+        try:
+            with open(os.path.join(entryDir, INFO_NAME), "rb") as f:
+                info = pickle.load(f)
+                
+            dataList = dict()
+            for i, column in enumerate(info["columns"]):
+                # plain array views, pandas should not have to deal with the memmap class
+                dataList[column] = np.asarray(np.load(os.path.join(entryDir, COLUMN_NAME % (i)), mmap_mode = "c" if memmap else None))
+                
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # missing, or removed while we were reading it
+            return None
+        
+        # mark as recently used
+        os.utime(os.path.join(entryDir, INFO_NAME))
+        dataframe = pd.DataFrame(dataList, index = info["index"], copy = False)
+        return info["metadata"], dataframe
+    
+    def store(self, key, metadata, dataframe):
+        entryDir = self.entryDir(key)
+        # write to a temporary directory first, so that readers never see a partial entry
+        tmpDir = "%s.tmp%d" % (entryDir, os.getpid())
+        shutil.rmtree(tmpDir, ignore_errors = True)
+        os.makedirs(tmpDir)
+        for i, column in enumerate(dataframe.columns):
+            np.save(os.path.join(tmpDir, COLUMN_NAME % (i)), dataframe[column].to_numpy())
+            
+        index = dataframe.index
+        if not isinstance(index, pd.RangeIndex):
+            index = index.to_numpy()
+            
+        info = {
+                "columns": list(dataframe.columns),
+                "index": index,
+                "metadata": metadata,
+                }
+        with open(os.path.join(tmpDir, INFO_NAME), "wb") as f:
+            pickle.dump(info, f, protocol = pickle.HIGHEST_PROTOCOL)
+            
+        try:
+            os.rename(tmpDir, entryDir)
+        except OSError:
+            # another process stored the same entry in the meantime
+            shutil.rmtree(tmpDir, ignore_errors = True)
+            
+        self.evict(keep = key)
+        return
+    
+    def entrySize(self, key):
+        entryDir = self.entryDir(key)
+        return sum(os.path.getsize(os.path.join(entryDir, fname)) for fname in os.listdir(entryDir))
+    
+    # removes least recently used entries until the cache fits in maxBytes. the entry keep is never removed
+    def evict(self, keep = None):
+        entries = []
+        for key in os.listdir(self.cacheDir):
+            if ".tmp" in key:
+                # entry that is being written
+                continue
+            
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.entryDir(key), INFO_NAME)), self.entrySize(key), key))
+            except OSError:
+                # entry that is being removed
+                continue
+            
+        total = sum(size for lastUsed, size, key in entries)
+        for lastUsed, size, key in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            
+            if key == keep:
+                continue
+            
+            shutil.rmtree(self.entryDir(key), ignore_errors = True)
+            total -= size
+            
+        return
+    
+    def clear(self):
+        for key in os.listdir(self.cacheDir):
+            shutil.rmtree(self.entryDir(key), ignore_errors = True)
+            
+        return
+    
\ No newline at end of file
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:02:16 2026
+
+@author: Kyle
+"""
+
+# command-line interface to the parsers, for converting whole campaigns of files without writing any Python:
+#     vmpff info <FILES, DIRECTORIES OR GLOB PATTERNS> [--json]
+#     vmpff convert <FILES, DIRECTORIES OR GLOB PATTERNS> --output <EXPORT DIRECTORY> [--format parquet]
+#     vmpff ce <FILES, DIRECTORIES OR GLOB PATTERNS> [--area 1.] [--protocol mode1] [--output ce.csv]
+# (or python -m vmpff.general.cli in place of vmpff). files are recognized by their first bytes, and processed across a
+# pool of worker processes. the software version of MPR files is identified from their headers, unless given with
+# --mpr-version. directories are searched for files by extension (.mpr or .nda). convert exports every file as its
+# own cell (named after the file, see cellNames) of a partitioned columnar export (see export.py). the exit status is 0
+# if every file succeeded, 1 if any failed and 2 for invalid arguments
+
+import os
+import sys
+import json
+import mmap
+import argparse
+import functools
+import collections
+
+from . import common
+from . import batch
+from . import export
+from ..biologic import VMPff
+from ..mticyc import BTSff
+# both instruments have a module named cycle_metrics
+from ..biologic import cycle_metrics as biologic_cycle_metrics
+from ..mticyc import cycle_metrics as mticyc_cycle_metrics
+
+# pandas is only imported once the first dataframe is built
+pd = common.LazyModule("pandas")
+
+FILE_TYPES = {
+        ".mpr": "MPR", 
+        ".nda": "NDA", 
+        }
+# bytes each file type starts with
+FILE_MAGIC = {
+        "MPR": VMPff.FILE_HEADER, 
+        "NDA": BTSff.FILE_HEADER, 
+        }
+# experiment classes of each cycling protocol, by file type
+PROTOCOLS = {
+        "mode1": {"MPR": biologic_cycle_metrics.BiologicMODE1CyclingExperiment, "NDA": mticyc_cycle_metrics.MTICycMODE1CyclingExperiment}, 
+        "pnnl": {"MPR": biologic_cycle_metrics.BiologicPNNLCyclingExperiment, "NDA": mticyc_cycle_metrics.MTICycPNNLCyclingExperiment}, 
+        }
+
+# identifies a file from its first bytes, whatever its extension
+def fileType(fileName):
+    with open(fileName, "rb") as f:
+        start = f.read(max(len(magic) for magic in FILE_MAGIC.values()))
+        
+    types = [name for name, magic in FILE_MAGIC.items() if start.startswith(magic)]
+    assert len(types) == 1, "Unrecognized file type, expected one of %s" % (", ".join(FILE_MAGIC))
+    return types[0]
+
+# returns the files among the inputs (files, directories or glob patterns) that can be parsed. files named
+# explicitly are always kept, so that those of an unknown type are reported
+def collectFiles(inputs):
+    fileNames = []
+    for item in inputs:
+        for fileName in batch.collectInputs(item):
+            if os.path.isfile(item) or os.path.splitext(fileName)[1].lower() in FILE_TYPES:
+                fileNames.append(fileName)
+                
+    return fileNames
+
+# name of the cell a file is exported as
+def cellName(fileName):
+    return os.path.splitext(os.path.basename(fileName))[0].replace("=", "_")
+
+# names of the cells the files are exported as, by file. a file whose name is shared by another one is named after
+# its path relative to the directory holding all of the files instead, with "_" for the path separators (e.g.
+# a/cell.mpr and b/cell.mpr become cells a_cell and b_cell). the names may still repeat (e.g. for cell.mpr and
+# cell.nda in the same directory), which is for the caller to check
+def cellNames(fileNames):
+    names = {fileName: cellName(fileName) for fileName in fileNames}
+    counts = collections.Counter(names.values())
+    if max(counts.values(), default = 0) > 1:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(fileName)) for fileName in fileNames])
+        for fileName, name in names.items():
+            if counts[name] > 1:
+                names[fileName] = cellName(os.path.relpath(os.path.abspath(fileName), root).replace(os.sep, "_"))
+                
+    return names
+
+# the following run in the worker processes, and return plain data only
+
+def fileInfo(fileName, version):
+    if fileType(fileName) == "MPR":
+        # only the section headers and the data section header are read
+        directory = VMPff.openFile(fileName, version)
+        y = directory.getSection(VMPff.VMP_DATA_SN)
+        return {
+                "file": fileName, 
+                "type": "MPR", 
+                "version": directory.version, 
+                "sections": directory.getNames(), 
+                "secVersion": y.secVersion, 
+                "date": y.date, 
+                "numDataPts": y.numDataPts, 
+                "columns": [col[VMPff.COL_NAME] for col in y.colList], 
+                }
+    
+    ptr = common.pointer()
+    with open(fileName, "rb") as f:
+        contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+        
+    header_info, step_infos = BTSff.parseHeader(contents, ptr)
+    date = header_info["date"]
+    return {
+            "file": fileName, 
+            "type": "NDA", 
+            "version": header_info["version"], 
+            "machine": header_info["machine"], 
+            "date": "%04d-%02d-%02d" % (date["year"], date["month"], date["day"]), 
+            "username": header_info["username"], 
+            "batch": header_info["batch"], 
+            "memo": header_info["memo"], 
+            "steps": [step_info["mode"] for step_info in step_infos[1: ]], 
+            # including invalid records, which the parser drops
+            "numDataPts": (len(contents) - ptr.getValue()) // BTSff.BTS_RECORD_INFO.itemsize, 
+            "columns": BTSff.selectColumns(None), 
+            }
+
+# cells is the name of the cell of every file (see cellNames)
+def convertFile(fileName, cells, outputDir, version, fmt, halfCycles, chunkRows):
+    if fileType(fileName) == "MPR":
+        experiment = biologic_cycle_metrics.BiologicExperiment(version)
+    else:
+        experiment = mticyc_cycle_metrics.MTICycExperiment()
+        
+    experiment.exportFile(fileName, outputDir, cells[fileName], rows = chunkRows, fmt = fmt, halfCycles = halfCycles)
+    return cells[fileName]
+
+def ceTable(fileName, protocol, area, version):
+    if fileType(fileName) == "MPR":
+        experiment = PROTOCOLS[protocol]["MPR"](area, version = version)
+    else:
+        experiment = PROTOCOLS[protocol]["NDA"](area)
+        
+    # the half cycles are summarized chunk by chunk, so a worker holds one chunk of a file at a time
+    table = experiment.calculate_CE_table(experiment.streamFile(fileName)).reset_index()
+    table.insert(0, "file", fileName)
+    return table
+
+def printInfo(info):
+    print(info["file"])
+    for key, value in info.items():
+        if key == "file":
+            continue
+        
+        print("    %-12s %s" % (key, ", ".join(str(v) for v in value) if isinstance(value, list) else value))
+        
+    return
+
+def parseArgs(argv = None):
+    parser = argparse.ArgumentParser(description = "Parses Biologic MPR and Neware NDA files.")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    # options shared by all commands
+    common_options = argparse.ArgumentParser(add_help = False)
+    common_options.add_argument("inputs", nargs = "+", help = "files, directories or glob patterns")
+    common_options.add_argument("--workers", type = int, default = None, help = "worker processes (default: one per CPU)")
+    common_options.add_argument("--mpr-version", type = int, default = None, choices = VMPff.ACCEPTED_VERSIONS, help = "software version of the MPR files (default: identified from each file)")
+    
+    info = subparsers.add_parser("info", parents = [common_options], help = "print the header information of files")
+    info.add_argument("--json", action = "store_true", help = "print as JSON")
+    
+    convert = subparsers.add_parser("convert", parents = [common_options], help = "export files to partitioned columnar files")
+    convert.add_argument("--output", "-o", required = True, help = "export directory")
+    convert.add_argument("--format", default = "parquet", choices = list(export.FORMATS), help = "file format")
+    convert.add_argument("--half-cycles", type = int, default = export.PARTITION_HALF_CYCLES, help = "half cycles per partition")
+    convert.add_argument("--chunk-rows", type = int, default = common.CHUNK_ROWS, help = "records decoded at a time")
+    
+    ce = subparsers.add_parser("ce", parents = [common_options], help = "calculate Coulombic efficiencies")
+    ce.add_argument("--protocol", default = "mode1", choices = list(PROTOCOLS), help = "cycling protocol of the files")
+    ce.add_argument("--area", type = float, default = 1., help = "electrode area")
+    ce.add_argument("--output", "-o", default = None, help = "CSV file to write (default: print)")
+    return parser.parse_args(argv)
+
+def main(argv = None):
+    args = parseArgs(argv)
+    fileNames = collectFiles(args.inputs)
+    if len(fileNames) == 0:
+        print("error: no files found", file = sys.stderr)
+        return 1
+    
+    if args.command == "info":
+        func = functools.partial(fileInfo, version = args.mpr_version)
+    elif args.command == "convert":
+        # a cell is replaced as a whole when written, so files exported as the same cell would overwrite each other
+        cells = cellNames(fileNames)
+        counts = collections.Counter(cells.values())
+        duplicates = [fileName for fileName, cell in cells.items() if counts[cell] > 1]
+        if len(duplicates) > 0 or len(cells) < len(fileNames):
+            for fileName in duplicates:
+                print("error: %s: exported as cell %s, as is another file" % (fileName, cells[fileName]), file = sys.stderr)
+                
+            if len(cells) < len(fileNames):
+                print("error: some files are given more than once", file = sys.stderr)
+                
+            return 2
+        
+        func = functools.partial(convertFile, cells = cells, outputDir = args.output, version = args.mpr_version, fmt = args.format, halfCycles = args.half_cycles, chunkRows = args.chunk_rows)
+    else:
+        func = functools.partial(ceTable, protocol = args.protocol, area = args.area, version = args.mpr_version)
+        
+    results, errors = batch.mapFiles(func, fileNames, args.workers)
+    if args.command == "info":
+        if args.json:
+            print(json.dumps(list(results.values()), indent = 4))
+        else:
+            for info in results.values():
+                printInfo(info)
+                
+    elif args.command == "convert":
+        for fileName, cell in results.items():
+            print("%s -> %s" % (fileName, export.cellDir(args.output, cell)))
+            
+    elif len(results) > 0:
+        table = pd.concat(results.values(), ignore_index = True)
+        if args.output is not None:
+            table.to_csv(args.output, index = False)
+        else:
+            print(table.to_csv(index = False), end = "")
+            
+    for fileName, e in errors.items():
+        print("error: %s: %s: %s" % (fileName, type(e).__name__, e), file = sys.stderr)
+        
+    return 1 if len(errors) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+    
\ No newline at end of file
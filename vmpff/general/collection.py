@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:14:37 2026
+
+@author: Kyle
+"""
+
+# many cells held as one. the measurement sequences of all cells are concatenated into a single dataframe, with a
+# categorical "cell" column and the [start, stop) rows of each cell, and the first and last rows of every half
+# cycle of every cell are kept in a single table. metrics of all cells (e.g. the Coulombic efficiency of every cycle
+# of every cell) are then computed by one grouped reduction over all of them rather than cell by cell. for example,
+# with the experiments loaded by batch.loadDirectory:
+#     cells = collection.ExperimentCollection(experiments)
+#     ce = cells.calculate_CE_table()
+#     fade = cells.capacityFade(normalize = True)
+
+import numpy as np
+import pandas as pd
+
+from . import cycle_tools
+
+FIRST = cycle_tools.FIRST
+
+class ExperimentCollection(object):
+    # experiments is a dictionary of loaded experiments by cell name (such as the experiments returned by
+    # batch.loadFiles). columns are the columns to keep (by default, those all cells have). the experiments are only
+    # needed while the collection is built: afterwards, it holds all the data itself
+    def __init__(self, experiments, columns = None):
+        assert len(experiments) > 0, "No experiments"
+        self.cells = list(experiments)
+        sequences = [experiments[cell].measurement_sequence for cell in self.cells]
+        if columns is None:
+            columns = [name for name in sequences[FIRST].columns if all(name in sequence.columns for sequence in sequences)]
+            
+        lengths = np.array([len(sequence) for sequence in sequences], dtype = np.int64)
+        # [offsets[i], offsets[i + 1]) are the rows of cell i
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self.data = pd.concat([sequence[columns] for sequence in sequences], ignore_index = True)
+        self.data.insert(0, "cell", pd.Categorical.from_codes(np.repeat(np.arange(len(self.cells)), lengths), categories = self.cells))
+        self.metadata = {cell: experiments[cell].metadata for cell in self.cells}
+        self.areas = np.array([experiments[cell].area for cell in self.cells], dtype = float)
+        # (step, half cycle) of the first plating and stripping half cycles of each cell, for constant-capacity
+        # cycling experiments (None otherwise)
+        self.plating, self.stripping = None, None
+        if all(isinstance(experiments[cell], cycle_tools.MODE1CyclingExperiment) for cell in self.cells):
+            self.plating = np.array([experiments[cell].CYCLE_PLATING for cell in self.cells])
+            self.stripping = np.array([experiments[cell].CYCLE_STRIPPING for cell in self.cells])
+            
+        # first and last rows of every half cycle of every cell, within data, indexed by cell number, step and half
+        # cycle. each experiment finds its own half cycles, as this depends on the instrument
+        extents = []
+        for i, cell in enumerate(self.cells):
+            cell_extents = experiments[cell].getHalfCycleExtents().reset_index()
+            cell_extents[["first", "last"]] += self.offsets[i]
+            cell_extents.insert(0, "cell", i)
+            extents.append(cell_extents)
+            
+        self.extents = pd.concat(extents, ignore_index = True)
+        return
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    # rows of one cell. this is a slice of data, not a copy
+    def getCell(self, cell):
+        i = self.cells.index(cell)
+        return self.data.iloc[self.offsets[i]: self.offsets[i + 1]]
+    
+    # GalvanostaticCyclingExperiment.getHalfCycleTable of every cell at once, indexed by cell, step and half cycle
+    def getHalfCycleTable(self):
+        cell, first, last = [self.extents[name].to_numpy() for name in ["cell", "first", "last"]]
+        Q, t = np.asarray(self.data["Q-Q0"], dtype = float), cycle_tools.sec2hr(np.asarray(self.data["time"], dtype = float))
+        return pd.DataFrame({
+                "capacity": np.abs(cycle_tools.specCapacity(Q[last], self.areas[cell]) - cycle_tools.specCapacity(Q[first], self.areas[cell])), 
+                "start": t[first], 
+                "end": t[last], 
+                }, index = pd.MultiIndex.from_arrays([pd.Categorical.from_codes(cell, categories = self.cells), self.extents["Ns"].to_numpy(), self.extents["half cycle"].to_numpy()], names = ["cell", "Ns", "half cycle"]))
+    
+    # half cycles of the given kind (plating or stripping, as (step, half cycle) of the first one per cell) of every
+    # cell, indexed by cell and cycle
+    def selectCycles(self, half_cycles, keys):
+        cell = half_cycles.index.codes[0]
+        Ns, half_cycle = [half_cycles.index.get_level_values(name).to_numpy() for name in ["Ns", "half cycle"]]
+        step, first = keys[cell, 0], keys[cell, 1]
+        selected = (Ns == step) & (half_cycle >= first) & ((half_cycle - first) % 2 == 0)
+        r = half_cycles.loc[selected]
+        r.index = pd.MultiIndex.from_arrays([r.index.get_level_values("cell"), (half_cycle[selected] - first[selected]) // 2], names = ["cell", "cycle"])
+        return r
+    
+    # MODE1CyclingExperiment.calculate_CE_table of every cell at once, indexed by cell and cycle. as for a single
+    # cell, the cycles of a cell end at its first incomplete one
+    def calculate_CE_table(self):
+        assert self.plating is not None, "Coulombic efficiencies are only defined here for constant-capacity cycling experiments"
+        half_cycles = self.getHalfCycleTable()
+        plating = self.selectCycles(half_cycles, self.plating)
+        stripping = self.selectCycles(half_cycles, self.stripping)
+        cycles = plating.join(stripping, how = "inner", lsuffix = " plating", rsuffix = " stripping").sort_index()
+        # a cycle counts if every cycle of its cell before it does
+        cycle = cycles.index.get_level_values("cycle").to_numpy()
+        complete = cycle == cycles.groupby(level = "cell", observed = True).cumcount().to_numpy()
+        complete &= pd.Series(complete).groupby(cycles.index.codes[0]).cummin().to_numpy()
+        cycles = cycles.loc[complete]
+        plating_Q, stripping_Q = cycles["capacity plating"].to_numpy(), cycles["capacity stripping"].to_numpy()
+        return pd.DataFrame({
+                "plating Q": plating_Q, 
+                "stripping Q": stripping_Q, 
+                "CE": stripping_Q / plating_Q, 
+                "duration": cycles["end stripping"].to_numpy() - cycles["start plating"].to_numpy(), 
+                }, index = cycles.index)
+    
+    # a column of calculate_CE_table (by default, the stripping capacity) as a matrix of cells by cycles, with NaN
+    # past the last cycle of each cell. with normalize set, each cell is relative to its first cycle
+    def capacityFade(self, column = "stripping Q", normalize = False):
+        r = self.calculate_CE_table()[column].unstack("cycle")
+        if normalize:
+            r = r.div(r.iloc[:, FIRST], axis = 0)
+            
+        return r
+    
\ No newline at end of file
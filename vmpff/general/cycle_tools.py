@@ -0,0 +1,658 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Nov 29 17:36:28 2023
+
+@author: Kyle
+"""
+
+import numpy as np
+
+from . import common
+from . import instrumentation
+
+# pandas is only imported once the first dataframe is built
+pd = common.LazyModule("pandas")
+
+sec2hr = lambda time_delta: time_delta / 3600.
+specCapacity = lambda capacity, area: capacity / area
+
+# common indices to reference first and last datapoints in some ordered series
+FIRST, LAST = 0, -1
+
+
+# custom exception type for incomplete cycling data
+class MissingCycleDataException(Exception):
+    pass
+
+
+# run-length index of a measurement sequence by some key columns (e.g. step number and half cycle). the runs of
+# rows with constant keys are found in one pass, after which the rows belonging to any key can be looked up without
+# scanning the sequence again. source is the dataframe the index was built for
+class SegmentIndex(object):
+    def __init__(self, source, columns):
+        columns = [np.asarray(column) for column in columns]
+        # number of rows indexed, [start, stop) row positions of each run, key values of each run, and the runs
+        # belonging to each key
+        self.size = 0
+        self.starts = np.zeros(0, dtype = np.int64)
+        self.stops = np.zeros(0, dtype = np.int64)
+        self.keys = [column[: 0] for column in columns]
+        self.runs = dict()
+        self.extend(source, columns)
+        return
+    
+    # adds rows appended to the source (e.g. while following a file), given the key columns of the appended rows
+    # only, so that the rows indexed before are not scanned again. source is the dataframe with the rows appended
+    def extend(self, source, columns):
+        self.source = source
+        columns = [np.asarray(column) for column in columns]
+        size = len(columns[FIRST])
+        with instrumentation.stage("index", rows = size) as s:
+            # whether each row starts a run. the first one does if there were no rows, or if it differs from the
+            # last run
+            changed = np.zeros(size, dtype = bool)
+            changed[: 1] = self.size == 0
+            for column, keyColumn in zip(columns, self.keys):
+                changed[1: ] |= column[1: ] != column[: -1]
+                if self.size > 0 and size > 0:
+                    changed[FIRST] |= column[FIRST] != keyColumn[LAST]
+                    
+            starts = np.flatnonzero(changed)
+            keys = [column[starts] for column in columns]
+            for run, key in enumerate(zip(*[keyColumn.tolist() for keyColumn in keys]), len(self.starts)):
+                self.runs.setdefault(key, []).append(run)
+                
+            self.size += size
+            self.starts = np.concatenate([self.starts, starts + (self.size - size)])
+            self.stops = np.append(self.starts[1: ], self.size) if len(self.starts) > 0 else np.zeros(0, dtype = np.int64)
+            self.keys = [np.concatenate([keyColumn, newKeys]) for keyColumn, newKeys in zip(self.keys, keys)]
+            s.set(segments = len(self.starts))
+            
+        return
+    
+    # returns the sorted [start, stop) row positions of all rows with any of the given keys, merging adjacent runs
+    def spans(self, keys):
+        runs = sorted(run for key in keys for run in self.runs.get(tuple(key), []))
+        r = []
+        for run in runs:
+            start, stop = self.starts[run], self.stops[run]
+            if len(r) > 0 and r[LAST][1] == start:
+                r[LAST] = (r[LAST][0], stop)
+            else:
+                r.append((start, stop))
+                
+        return r
+    
+    
+# least number of rows a ColumnBuffer makes room for
+BUFFER_MIN_ROWS = 1 << 12
+
+# columns of a measurement sequence that rows keep being appended to (e.g. while following a file). each column is
+# held in an array with room to spare, which grows to twice the rows held whenever it is full, so that appending
+# costs time in proportion to the rows appended rather than to all rows so far, and getFrame() gives a dataframe of
+# views into the filled part of the arrays rather than a copy. rows are indexed by position, as in a full parse
+class ColumnBuffer(object):
+    def __init__(self, dataframe):
+        self.columns = list(dataframe.columns)
+        self.arrays = {name: np.asarray(dataframe[name])[: 0] for name in self.columns}
+        self.size = 0
+        self.capacity = 0
+        self.append(dataframe)
+        return
+    
+    # appends the rows of a dataframe with the same columns
+    def append(self, dataframe):
+        size = self.size + len(dataframe)
+        if size > self.capacity:
+            self.capacity = max(2 * size, BUFFER_MIN_ROWS)
+            for name in self.columns:
+                array = np.empty(self.capacity, dtype = self.arrays[name].dtype)
+                array[: self.size] = self.arrays[name][: self.size]
+                self.arrays[name] = array
+                
+        for name in self.columns:
+            self.arrays[name][self.size: size] = np.asarray(dataframe[name])
+            
+        self.size = size
+        return
+    
+    # the rows so far. appending more rows later does not change the dataframe
+    def getFrame(self):
+        return pd.DataFrame({name: self.arrays[name][: self.size] for name in self.columns}, index = pd.RangeIndex(self.size), copy = False)
+    
+    
+# row positions covered by a list of spans
+def spanIndices(spans):
+    if len(spans) == 0:
+        return np.zeros(0, dtype = int)
+    
+    return np.concatenate([np.arange(start, stop) for start, stop in spans])
+
+# first and last row of each (step, half cycle) key, given the keys and [start, stop) rows of a set of runs
+def halfCycleExtents(Ns, half_cycle, starts, stops):
+    runs = pd.DataFrame({
+            "Ns": Ns, 
+            "half cycle": half_cycle, 
+            "first": starts, 
+            "last": stops - 1, 
+            })
+    return runs.groupby(["Ns", "half cycle"]).agg({"first": "min", "last": "max"})
+
+# length of the prefix of each segment [start, start + length) of a series before it first crosses a threshold (the
+# whole segment if it never does), written to out. each segment is only scanned up to its first crossing. upper is
+# set if the threshold is an upper limit. this runs compiled (see getCrossingKernel) if numba is installed
+def firstCrossings(series, starts, lengths, threshold, upper, out):
+    for i in range(len(starts)):
+        out[i] = lengths[i]
+        for j in range(lengths[i]):
+            value = series[starts[i] + j]
+            if (value > threshold) if upper else (value < threshold):
+                out[i] = j
+                break
+            
+    return out
+
+# firstCrossings compiled by numba, on first use (False if numba is not installed)
+crossingKernel = None
+
+def getCrossingKernel():
+    global crossingKernel
+    if crossingKernel is None:
+        try:
+            import numba
+            crossingKernel = numba.njit(cache = True, nogil = True)(firstCrossings)
+        except ImportError:
+            crossingKernel = False
+            
+    return crossingKernel
+
+# lengths of the segments [start, start + length) of a series, cut off before each first crosses a threshold.
+# direction is as in GalvanostaticCyclingExperiment.thresholdIdx. without numba, the crossings of the whole series
+# are found at once and each segment looks up its first one
+def cutoffLengths(series, starts, lengths, threshold, direction):
+    assert direction in (0, 1), "direction argument should be 0 (lower) or 1 (upper)"
+    starts, lengths = np.asarray(starts, dtype = np.int64), np.asarray(lengths, dtype = np.int64)
+    kernel = getCrossingKernel()
+    if kernel:
+        return kernel(np.ascontiguousarray(series), starts, lengths, threshold, direction == 1, np.empty(len(starts), dtype = np.int64))
+    
+    crossed = np.flatnonzero(series > threshold if direction == 1 else series < threshold)
+    # first crossing at or after the start of each segment, which counts if it is before its end
+    first = crossed[np.minimum(np.searchsorted(crossed, starts), len(crossed) - 1)] if len(crossed) > 0 else starts + lengths
+    return np.where((first >= starts) & (first < starts + lengths), first - starts, lengths)
+
+# rows of a dataframe covered by a list of spans. a single span (the usual case) gives a slice, which does not copy
+def sliceSpans(dataframe, spans):
+    if len(spans) == 1:
+        return dataframe.iloc[spans[FIRST][0]: spans[FIRST][1]]
+    
+    return dataframe.iloc[spanIndices(spans)]
+
+
+# columns a measurement sequence must have for HalfCycleAccumulator (plus "mode", when resting rows are excluded)
+STREAM_COLUMNS = ["Ns", "half cycle", "time", "Q-Q0", "Ewe"]
+
+# running metrics of every (step, half cycle) of a measurement sequence fed chunk by chunk, e.g. from the iterChunks
+# of either parser, so that a whole file is summarized while holding only one chunk and one open half cycle at a
+# time. rows whose mode is rest_mode (if given) are left out, so that a half cycle ends at its last row before
+# resting. a half cycle is finished once a row of another half cycle comes along, and update() returns those
+# finished by each chunk. the energy is the integral of Ewe over Q-Q0 (by the trapezoidal rule)
+class HalfCycleAccumulator(object):
+    def __init__(self, rest_mode = None):
+        self.rest_mode = rest_mode
+        # running metrics of the half cycle that is still open (None before the first row), and the finished ones
+        self.current = None
+        self.finished = []
+        # Q-Q0 and Ewe of the last row seen, which the energy of the next row is integrated from
+        self.lastQ = None
+        self.lastV = None
+        return
+    
+    # metrics of the rows [start, stop) of a chunk, all belonging to the same half cycle
+    def runMetrics(self, Ns, half_cycle, t, Q, V, energy, start, stop):
+        return {
+                "Ns": Ns[start], 
+                "half cycle": half_cycle[start], 
+                "start time": t[start], 
+                "end time": t[stop - 1], 
+                "start Q": Q[start], 
+                "end Q": Q[stop - 1], 
+                "energy": energy, 
+                "min Ewe": V[start: stop].min(), 
+                "max Ewe": V[start: stop].max(), 
+                "end Ewe": V[stop - 1], 
+                "rows": stop - start, 
+                }
+                
+    def update(self, dataframe):
+        Ns, half_cycle = np.asarray(dataframe["Ns"]), np.asarray(dataframe["half cycle"])
+        t, Q, V = [np.asarray(dataframe[name], dtype = float) for name in ["time", "Q-Q0", "Ewe"]]
+        if self.rest_mode is not None:
+            keep = np.asarray(dataframe["mode"]) != self.rest_mode
+            Ns, half_cycle, t, Q, V = Ns[keep], half_cycle[keep], t[keep], Q[keep], V[keep]
+            
+        finished = []
+        if len(Ns) == 0:
+            return finished
+        
+        changed = (Ns[1: ] != Ns[: -1]) | (half_cycle[1: ] != half_cycle[: -1])
+        starts = np.concatenate([[0], np.flatnonzero(changed) + 1])
+        stops = np.append(starts[1: ], len(Ns))
+        # energy of every step from the previous row, which does not count across a change of half cycle
+        previousQ = np.concatenate([[Q[FIRST] if self.lastQ is None else self.lastQ], Q[: -1]])
+        previousV = np.concatenate([[V[FIRST] if self.lastV is None else self.lastV], V[: -1]])
+        energy = 0.5 * (V + previousV) * (Q - previousQ)
+        continued = self.current is not None and (self.current["Ns"], self.current["half cycle"]) == (Ns[FIRST], half_cycle[FIRST])
+        energy[starts[0 if not continued else 1: ]] = 0.
+        run_energy = np.add.reduceat(energy, starts)
+        for run, (start, stop) in enumerate(zip(starts, stops)):
+            metrics = self.runMetrics(Ns, half_cycle, t, Q, V, run_energy[run], start, stop)
+            if run == 0 and continued:
+                self.current.update({
+                        "end time": metrics["end time"], 
+                        "end Q": metrics["end Q"], 
+                        "energy": self.current["energy"] + metrics["energy"], 
+                        "min Ewe": min(self.current["min Ewe"], metrics["min Ewe"]), 
+                        "max Ewe": max(self.current["max Ewe"], metrics["max Ewe"]), 
+                        "end Ewe": metrics["end Ewe"], 
+                        "rows": self.current["rows"] + metrics["rows"], 
+                        })
+            else:
+                if self.current is not None:
+                    finished.append(self.current)
+                    
+                self.current = metrics
+                
+        self.lastQ, self.lastV = Q[LAST], V[LAST]
+        self.finished.extend(finished)
+        return finished
+    
+    # finishes the open half cycle, once all chunks are in. returns it, or None if no row was seen
+    def close(self):
+        last = self.current
+        if last is not None:
+            self.finished.append(last)
+            
+        self.current = None
+        return last
+    
+    # the finished half cycles, in the layout of GalvanostaticCyclingExperiment.getHalfCycleTable (specific capacity,
+    # and start and end in hours) with the other metrics alongside. a half cycle interrupted by another one is
+    # merged, as in getHalfCycleExtents. hc is subtracted from the half cycles
+    def table(self, area, hc = 0):
+        columns = ["Ns", "half cycle", "start time", "end time", "start Q", "end Q", "energy", "min Ewe", "max Ewe", "end Ewe", "rows"]
+        rows = pd.DataFrame(self.finished, columns = columns)
+        rows["half cycle"] = rows["half cycle"].astype(int) - hc
+        r = rows.groupby(["Ns", "half cycle"]).agg({
+                "start time": "first", 
+                "end time": "last", 
+                "start Q": "first", 
+                "end Q": "last", 
+                "energy": "sum", 
+                "min Ewe": "min", 
+                "max Ewe": "max", 
+                "end Ewe": "last", 
+                "rows": "sum", 
+                })
+        r.insert(0, "capacity", np.abs(specCapacity(r["end Q"], area) - specCapacity(r["start Q"], area)))
+        r.insert(1, "start", sec2hr(r["start time"]))
+        r.insert(2, "end", sec2hr(r["end time"]))
+        r["duration"] = r["end"] - r["start"]
+        return r
+    
+    
+# key columns of the steps summarized by stepSummary (those present, and at least the step number), and the columns
+# averaged over each step (if present)
+STEP_KEYS = ["cycle number", "Ns"]
+STEP_KEY = "Ns"
+SUMMARY_MEAN_COLUMNS = ["<I>", "control I", "current", "<Ewe>", "Ewe"]
+
+# sums of values over runs starting at the given positions (which reduceat does not take empty)
+def runSums(values, starts):
+    if len(starts) == 0:
+        return np.zeros(0)
+    
+    return np.add.reduceat(values, starts)
+
+# the STEP_KEYS a measurement sequence has
+def stepKeys(dataframe):
+    assert STEP_KEY in dataframe.columns, "Steps cannot be told apart without the %s column" % (STEP_KEY)
+    return [key for key in STEP_KEYS if key in dataframe.columns]
+
+# summary of every step of a measurement sequence, like the cycle summary of EC-Lab: one row per run of rows with
+# the same keys (by default, stepKeys), with its first and last row, start, end and duration (in hours), charge
+# passed (the change in Q-Q0 from the last row of the previous step, as the first row of a step already counts
+# charge passed in it), energy (the integral of Ewe over Q-Q0 over the same rows, by the trapezoidal rule), the mean
+# of SUMMARY_MEAN_COLUMNS and the end voltage. the first step counts from Q-Q0 = 0 if the measurement sequence starts
+# at the first record, and from its own first row otherwise. the runs are found in one pass, and each column is then
+# reduced over all runs at once. only the rows from position start on are summarized (see extendStepSummary)
+def stepSummary(dataframe, keys = None, start = 0):
+    if keys is None:
+        keys = stepKeys(dataframe)
+        
+    column = lambda name, dtype = None: np.asarray(np.asarray(dataframe[name])[start: ], dtype = dtype)
+    index = SegmentIndex(dataframe, [column(key) for key in keys])
+    starts, stops = index.starts, index.stops
+    with instrumentation.stage("summary", rows = index.size, steps = len(starts)):
+        t, Q, V = [column(name, float) for name in ["time", "Q-Q0", "Ewe"]]
+        # Q-Q0 and Ewe of the row before each row
+        Q_before, V_before = np.empty(len(Q)), np.empty(len(V))
+        Q_before[1: ], V_before[1: ] = Q[: -1], V[: -1]
+        if start > 0:
+            Q_before[: 1], V_before[: 1] = [float(np.asarray(dataframe[name])[start - 1]) for name in ["Q-Q0", "Ewe"]]
+        elif len(dataframe) > 0:
+            Q_before[: 1], V_before[: 1] = (0. if dataframe.index[FIRST] == 0 else Q[FIRST]), V[FIRST]
+            
+        r = {key: keyColumn for key, keyColumn in zip(keys, index.keys)}
+        r["first"] = starts + start
+        r["last"] = stops - 1 + start
+        r["start"] = sec2hr(t[starts])
+        r["end"] = sec2hr(t[stops - 1])
+        r["duration"] = r["end"] - r["start"]
+        r["charge"] = Q[stops - 1] - Q_before[starts]
+        r["energy"] = runSums(0.5 * (V + V_before) * (Q - Q_before), starts)
+        for name in SUMMARY_MEAN_COLUMNS:
+            if name in dataframe.columns:
+                r["mean %s" % (name)] = runSums(column(name, float), starts) / (stops - starts)
+                
+        r["end Ewe"] = V[stops - 1]
+        
+    return pd.DataFrame(r, index = pd.RangeIndex(len(starts), name = "step"))
+
+# stepSummary of a dataframe made of the rows of the one summarized with more rows appended. only the last step
+# (which the new rows may continue) and the steps after it are summarized again
+def extendStepSummary(summary, dataframe, keys = None):
+    if len(summary) == 0:
+        return stepSummary(dataframe, keys)
+    
+    r = pd.concat([summary.iloc[: LAST], stepSummary(dataframe, keys, int(summary["first"].iloc[LAST]))], ignore_index = True)
+    return r.rename_axis("step")
+
+# base class for galvanostatic cycling data
+class GalvanostaticCyclingExperiment(object):
+    def __init__(self, area):
+        self.area = area
+        # these attributes must be instantiated by an instrument-specific method
+        self.metadata = None
+        self.measurement_sequence = None
+        # step summary of the measurement sequence, and the measurement sequence it was built for
+        self.step_summary = None
+        self.step_summary_source = None
+        return
+    
+    # these functions are "utility" functions that don't need an instantiation
+    # =============================================================================================
+    def capacityDiff(self, series):
+        return series.iloc[LAST]["capacity"] - series.iloc[FIRST]["capacity"]
+    
+    def checkHalfCycle(self, series, throw_error = False):
+        ok = False
+        if len(series["capacity"]) > 0: ok = True
+        if not ok and throw_error: raise MissingCycleDataException
+        return ok
+    
+    def stitchHalfCycles(self, half_cycles, add_breaks = False):
+        assert len(half_cycles) > 0, "Empty data"
+        # get columns and check that data are homogeneous
+        data_columns = half_cycles[FIRST].columns
+        for half_cycle in half_cycles[FIRST + 1: ]:
+            assert (half_cycle.columns == data_columns).all(), "Unmatching data columns"
+            
+        if add_breaks:
+            # create the break item
+            brk = {}
+            for data_column in data_columns:
+                brk[data_column] = [None]
+                
+            brk = pd.DataFrame(brk)
+            # add breaks between every pair of data series
+            half_cycles = common.intersperse(half_cycles, brk)
+            
+        return pd.concat(half_cycles, ignore_index = True)
+    
+    # selects the prefix of the data where the voltage is below a specified threshold. direction argument
+    # refers to whether the threshold is a lower limit (0) or upper limit (1). if the threshold is never crossed,
+    # this is the entire series
+    def thresholdIdx(self, series, threshold, direction):
+        return int(cutoffLengths(series, [0], [series.shape[0]], threshold, direction)[FIRST])
+    
+    # =============================================================================================
+    
+    def getVvsTAfterStep(self, step_id = None, relative = True):
+        if step_id is None:
+            # return entire sequence
+            cycleData = self.measurement_sequence
+        else:
+            cycleData = self.measurement_sequence.loc[self.measurement_sequence["Ns"] > step_id]
+            
+        t, V = np.array(cycleData["time"]), np.array(cycleData["Ewe"])
+        t = sec2hr(t)
+        if relative and len(t) > 0:
+            t = t - t[FIRST]
+            
+        return pd.DataFrame({
+                "time": t, 
+                "voltage": V, 
+                })
+                
+    # this is NOT DEFINED here. it depends on the instrument used to collect the data
+    # so we defer to the child class to inherit this method from an instrument experiment parent class
+    def getCycleData_hc(self, cycle, half_cycle, include_rest):
+        raise NotImplementedError
+    
+    # row positions of a half cycle, as a list of [start, stop) spans. like getCycleData_hc, this depends on the
+    # instrument
+    def getCycleSpans_hc(self, cycle, half_cycle, include_rest):
+        raise NotImplementedError
+    
+    # first and last row of every half cycle (excluding rest), indexed by step and half cycle. like getCycleData_hc,
+    # this depends on the instrument
+    def getHalfCycleExtents(self):
+        raise NotImplementedError
+    
+    # capacity (as calculated by capacityDiff on the output of VvsCapacity_hc) and start and end times of every half
+    # cycle, indexed by step and half cycle. all half cycles are done at once from their first and last rows
+    def getHalfCycleTable(self):
+        extents = self.getHalfCycleExtents()
+        first, last = extents["first"].to_numpy(), extents["last"].to_numpy()
+        Q, t = np.array(self.measurement_sequence["Q-Q0"]), sec2hr(np.array(self.measurement_sequence["time"]))
+        return pd.DataFrame({
+                "capacity": np.abs(specCapacity(Q[last], self.area) - specCapacity(Q[first], self.area)), 
+                "start": t[first], 
+                "end": t[last], 
+                }, index = extents.index)
+                
+    # stepSummary of the measurement sequence. it is built once for each measurement sequence, on first use, so
+    # repeated queries are free
+    def getStepSummary(self):
+        if self.step_summary is None or self.step_summary_source is not self.measurement_sequence:
+            self.step_summary = stepSummary(self.measurement_sequence)
+            self.step_summary_source = self.measurement_sequence
+            
+        return self.step_summary
+    
+    # getHalfCycleTable from chunks of a measurement sequence (each holding at least STREAM_COLUMNS), without ever
+    # holding all of it. rest_mode is as in HalfCycleAccumulator, and hc is subtracted from the half cycles
+    def streamHalfCycleTable(self, chunks, rest_mode = None, hc = 0):
+        accumulator = HalfCycleAccumulator(rest_mode)
+        for chunk in chunks:
+            accumulator.update(chunk)
+            
+        accumulator.close()
+        return accumulator.table(self.area, hc)
+    
+    # looks up half cycles (step, half cycle) in the output of getHalfCycleTable. missing ones are NaN
+    def lookupHalfCycles(self, half_cycles, cycle, half_cycle):
+        cycle, half_cycle = np.broadcast_arrays(cycle, half_cycle)
+        return half_cycles.reindex(pd.MultiIndex.from_arrays([cycle, half_cycle], names = ["Ns", "half cycle"]))
+    
+    def VvsT_hc(self, cycle, half_cycle, relative = False, include_rest = False, Vcutoff = None):
+        cycleData = self.getCycleData_hc(cycle, half_cycle, include_rest = include_rest)
+        t, V = np.array(cycleData["time"]), np.array(cycleData["Ewe"])
+        if Vcutoff is not None:
+            firstCrossing = self.thresholdIdx(V, *Vcutoff)
+            t, V = t[: firstCrossing], V[: firstCrossing]
+            
+        t = sec2hr(t)
+        if relative and len(t) > 0:
+            # calculate time relative to cycle start (should always be positive)
+            t = t - t[FIRST]
+            
+        return pd.DataFrame({
+                "time": t, 
+                "voltage": V, 
+                })
+                
+    def VvsCapacity_hc(self, cycle, half_cycle, relative = True, rectify = True, include_rest = False, Vcutoff = None):
+        cycleData = self.getCycleData_hc(cycle, half_cycle, include_rest = include_rest)
+        Q, V = np.array(cycleData["Q-Q0"]), np.array(cycleData["Ewe"])
+        if Vcutoff is not None:
+            firstCrossing = self.thresholdIdx(V, *Vcutoff)
+            Q, V = Q[: firstCrossing], V[: firstCrossing]
+            
+        # compute specific capacity
+        Q = specCapacity(Q, self.area)
+        if len(Q) > 0:
+            if relative: Q = Q - Q[FIRST]
+            if rectify: Q = np.abs(Q)
+            
+        return pd.DataFrame({
+                "capacity": Q, 
+                "voltage": V, 
+                })
+                
+    # VvsCapacity_hc over a list of (step, half cycle) keys, stitched as by stitchHalfCycles (with the same default
+    # for add_breaks). the rows of all half cycles are gathered, cut off and converted to specific capacity in one
+    # pass, straight into a single preallocated array. with add_breaks set, consecutive half cycles are separated by a
+    # row of NaN, so that they plot as separate lines
+    def VvsCapacity_hcs(self, keys, relative = True, rectify = True, include_rest = False, Vcutoff = None, add_breaks = False):
+        spans = [self.getCycleSpans_hc(cycle, half_cycle, include_rest = include_rest) for cycle, half_cycle in keys]
+        rows = spanIndices([span for key_spans in spans for span in key_spans])
+        lengths = np.array([sum(stop - start for start, stop in key_spans) for key_spans in spans], dtype = int)
+        # position of each half cycle within rows
+        starts = np.cumsum(lengths) - lengths
+        V = np.asarray(self.measurement_sequence["Ewe"])[rows]
+        if Vcutoff is not None:
+            lengths = cutoffLengths(V, starts, lengths, *Vcutoff)
+            
+        # source and destination of every row kept, by half cycle and position within it
+        kept_starts = np.cumsum(lengths) - lengths
+        half_cycle = np.repeat(np.arange(len(keys)), lengths)
+        within = np.arange(lengths.sum()) - kept_starts[half_cycle]
+        src = starts[half_cycle] + within
+        dst = (kept_starts + add_breaks * np.arange(len(keys)))[half_cycle] + within
+        r = np.full((lengths.sum() + add_breaks * max(len(keys) - 1, 0), 2), common.NAN)
+        Q = specCapacity(np.asarray(self.measurement_sequence["Q-Q0"])[rows[src]], self.area)
+        if relative:
+            Q = Q - Q[kept_starts[half_cycle]]
+            
+        if rectify:
+            Q = np.abs(Q)
+            
+        r[dst, 0] = Q
+        r[dst, 1] = V[src]
+        return pd.DataFrame(r, columns = ["capacity", "voltage"], copy = False)
+    
+    
+# class representing constant-capacity cycling experiments
+class MODE1CyclingExperiment(GalvanostaticCyclingExperiment):
+    def __init__(self, area, REST, CYCLE_PLATING, CYCLE_STRIPPING):
+        GalvanostaticCyclingExperiment.__init__(self, area)
+        self.REST = REST
+        self.CYCLE_PLATING = CYCLE_PLATING
+        self.CYCLE_STRIPPING = CYCLE_STRIPPING
+        return
+    
+    # default behavior is to get all data after the rest step
+    def getTimeSeries(self):
+        return self.getVvsTAfterStep(step_id = self.REST[0])
+    
+    # plating and stripping capacity, Coulombic efficiency and duration (from the start of plating to the end of
+    # stripping) of every cycle. half_cycles is the output of getHalfCycleTable (or of streamHalfCycleTable), which
+    # is built from the measurement sequence if not given
+    def calculate_CE_table(self, half_cycles = None):
+        if half_cycles is None:
+            half_cycles = self.getHalfCycleTable()
+            
+        # there cannot be more cycles than half cycles
+        cyc_nums = np.arange(len(half_cycles) + 1)
+        plating = self.lookupHalfCycles(half_cycles, self.CYCLE_PLATING[0], self.CYCLE_PLATING[1] + 2 * cyc_nums)
+        stripping = self.lookupHalfCycles(half_cycles, self.CYCLE_STRIPPING[0], self.CYCLE_STRIPPING[1] + 2 * cyc_nums)
+        # we can only calculate CEs up to the last full cycle
+        num_cycles = np.argmin(plating["capacity"].notna().to_numpy() & stripping["capacity"].notna().to_numpy())
+        plating_Q, stripping_Q = plating["capacity"].to_numpy()[: num_cycles], stripping["capacity"].to_numpy()[: num_cycles]
+        return pd.DataFrame({
+                "plating Q": plating_Q, 
+                "stripping Q": stripping_Q, 
+                "CE": stripping_Q / plating_Q, 
+                "duration": stripping["end"].to_numpy()[: num_cycles] - plating["start"].to_numpy()[: num_cycles], 
+                }, index = pd.RangeIndex(num_cycles, name = "cycle"))
+                
+    # definition of Coulombic efficiency for constant-capacity cycling
+    def calculate_CE(self):
+        return np.array(self.calculate_CE_table()["CE"])
+    
+    
+# class representing PNNL cycling experiments
+class PNNLCyclingExperiment(GalvanostaticCyclingExperiment):
+    def __init__(self, area, REST, INITIAL_PLATING, INITIAL_STRIPPING, TEST_PLATING, SHORT_CYCLE_PLATING, SHORT_CYCLE_STRIPPING, TEST_STRIPPING, NUM_SHORT_CYCLES):
+        GalvanostaticCyclingExperiment.__init__(self, area)
+        self.REST = REST
+        self.INITIAL_PLATING = INITIAL_PLATING
+        self.INITIAL_STRIPPING = INITIAL_STRIPPING
+        self.TEST_PLATING = TEST_PLATING
+        self.SHORT_CYCLE_PLATING = SHORT_CYCLE_PLATING
+        self.SHORT_CYCLE_STRIPPING = SHORT_CYCLE_STRIPPING
+        self.TEST_STRIPPING = TEST_STRIPPING
+        self.NUM_SHORT_CYCLES = NUM_SHORT_CYCLES
+        return
+    
+    def getTimeSeries(self):
+        return self.getVvsTAfterStep(step_id = self.REST[0])
+    
+    # plating and stripping capacity, Coulombic efficiency and duration of the initial cycle, of each short cycle and
+    # of the test as a whole (whose capacities and duration include the short cycles). half_cycles is as for
+    # MODE1CyclingExperiment.calculate_CE_table
+    def calculate_CE_table(self, half_cycles = None):
+        if half_cycles is None:
+            half_cycles = self.getHalfCycleTable()
+            
+        short_cycles = np.arange(self.NUM_SHORT_CYCLES)
+        steps = [
+                self.INITIAL_PLATING, 
+                self.INITIAL_STRIPPING, 
+                self.TEST_PLATING, 
+                self.TEST_STRIPPING, 
+                ]
+        half_cycle_keys = np.concatenate([
+                np.array(steps), 
+                np.stack([np.full(self.NUM_SHORT_CYCLES, self.SHORT_CYCLE_PLATING[0]), self.SHORT_CYCLE_PLATING[1] + 2 * short_cycles], axis = 1), 
+                np.stack([np.full(self.NUM_SHORT_CYCLES, self.SHORT_CYCLE_STRIPPING[0]), self.SHORT_CYCLE_STRIPPING[1] + 2 * short_cycles], axis = 1), 
+                ], axis = 0)
+        found = self.lookupHalfCycles(half_cycles, half_cycle_keys[:, 0], half_cycle_keys[:, 1])
+        if found["capacity"].isna().any():
+            raise MissingCycleDataException
+        
+        Q, start, end = found["capacity"].to_numpy(), found["start"].to_numpy(), found["end"].to_numpy()
+        short_plating, short_stripping = slice(4, 4 + self.NUM_SHORT_CYCLES), slice(4 + self.NUM_SHORT_CYCLES, None)
+        # test capacities are summed in the order the half cycles occur
+        test_plating_Q = sum([Q[2]] + list(Q[short_plating]))
+        test_stripping_Q = sum(list(Q[short_stripping]) + [Q[3]])
+        plating_Q = np.concatenate([[Q[0]], Q[short_plating], [test_plating_Q]])
+        stripping_Q = np.concatenate([[Q[1]], Q[short_stripping], [test_stripping_Q]])
+        # short cycles strip before they plate, so a cycle lasts from whichever half cycle starts first to whichever ends last
+        plating_start, plating_end = np.concatenate([[start[0]], start[short_plating], [start[2]]]), np.concatenate([[end[0]], end[short_plating], [end[2]]])
+        stripping_start, stripping_end = np.concatenate([[start[1]], start[short_stripping], [start[3]]]), np.concatenate([[end[1]], end[short_stripping], [end[3]]])
+        return pd.DataFrame({
+                "plating Q": plating_Q, 
+                "stripping Q": stripping_Q, 
+                "CE": stripping_Q / plating_Q, 
+                "duration": np.maximum(plating_end, stripping_end) - np.minimum(plating_start, stripping_start), 
+                }, index = pd.Index(["initial"] + ["short %d" % (i + 1) for i in short_cycles] + ["test"], name = "cycle"))
+                
+    def calculate_CE(self):
+        CE_table = self.calculate_CE_table()
+        initialCE, testCE = CE_table.loc["initial", "CE"], CE_table.loc["test", "CE"]
+        return initialCE, testCE
+    
+    
\ No newline at end of file
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:14:52 2026
+
+@author: Kyle
+"""
+
+# export of parsed experiments to compressed columnar files, so that the cycles of interest can be scanned (e.g. by a
+# query engine) without parsing the instrument files again. an export holds any number of cells, each partitioned by
+# range of half cycles, in hive style:
+#     <rootDir>/cell=<cell>/half_cycles=<first>/part-0.parquet
+# where a partition holds the rows of half cycles [first, first + halfCycles), usually in a single part file. the
+# metadata of each cell (e.g. the settings section of an MPR file, or the header and step definitions of an NDA file)
+# are pickled next to its partitions. pyarrow is needed for the parquet and arrow formats, and pytables for hdf5
+
+import os
+import shutil
+import pickle
+import numpy as np
+
+from . import common
+
+# pandas is only imported once the first dataframe is built
+pd = common.LazyModule("pandas")
+
+# file extension of each format
+FORMATS = {
+        "parquet": ".parquet", 
+        "arrow": ".arrow", 
+        "hdf5": ".h5", 
+        }
+# default number of half cycles per partition
+PARTITION_HALF_CYCLES = 20
+# column the partitions are keyed by
+PARTITION_COLUMN = "half cycle"
+# name of the record number column (the index of the measurement sequence) in the files
+INDEX_NAME = "record"
+# key of the measurement sequence within hdf5 files, and their compression level. higher levels are many times slower
+# to write for little gain
+HDF5_KEY = "measurement_sequence"
+HDF5_COMPLEVEL = 5
+# name of the file holding the metadata and export options of a cell
+INFO_NAME = "info.pkl"
+# name of the part files of a partition, by number
+PART_NAME = "part-%d"
+
+# pyarrow is only needed for exporting, so it is imported on first use
+def importArrow():
+    import pyarrow
+    import pyarrow.parquet
+    import pyarrow.ipc
+    return pyarrow
+
+def cellDir(rootDir, cell):
+    assert os.sep not in str(cell) and "=" not in str(cell), "Invalid cell name %s" % (cell)
+    return os.path.join(rootDir, "cell=%s" % (cell))
+
+# returns the names of the cells in an export
+def listCells(rootDir):
+    return sorted(name[len("cell="): ] for name in os.listdir(rootDir) if name.startswith("cell=") and ".tmp" not in name)
+
+# returns the first half cycle of the partition of every part file of a cell, and the part file, in order
+def listPartitions(rootDir, cell, fmt):
+    r = []
+    for name in os.listdir(cellDir(rootDir, cell)):
+        if name.startswith("half_cycles="):
+            partitionDir = os.path.join(cellDir(rootDir, cell), name)
+            for partName in os.listdir(partitionDir):
+                if partName.startswith("part-") and partName.endswith(FORMATS[fmt]):
+                    r.append((int(name[len("half_cycles="): ]), int(partName[len("part-"): -len(FORMATS[fmt])]), os.path.join(partitionDir, partName)))
+                    
+    return [(first, path) for first, part, path in sorted(r)]
+
+# writes the measurement sequence of one cell, a chunk at a time, so that a file can be exported without ever holding
+# all of it in memory. only one file writer is open at a time: as half cycles only ever count up, the writer of a
+# partition is closed as soon as the rows move on to the next one (should rows ever come back to a partition, they go
+# to another part file of it). the cell is written to a temporary directory first and replaces any earlier export of
+# the cell on close, so that readers never see a partial export. use as a context manager:
+#     with export.PartitionWriter(rootDir, "cell1", experiment.metadata) as writer:
+#         for chunk in chunks:
+#             writer.write(chunk)
+class PartitionWriter(object):
+    def __init__(self, rootDir, cell, metadata = None, fmt = "parquet", halfCycles = PARTITION_HALF_CYCLES, compression = "zstd"):
+        assert fmt in FORMATS, "Unknown format %s, expected one of %s" % (fmt, ", ".join(FORMATS))
+        assert halfCycles > 0, "Partitions must hold at least one half cycle"
+        self.cellDir = cellDir(rootDir, cell)
+        self.tmpDir = "%s.tmp%d" % (self.cellDir, os.getpid())
+        self.metadata = metadata
+        self.fmt = fmt
+        self.halfCycles = halfCycles
+        self.compression = compression
+        # the open file writer and the first half cycle of its partition, the number of part files of each partition
+        # and the arrow schema all of them write
+        self.writer = None
+        self.writerFirst = None
+        self.parts = dict()
+        self.schema = None
+        self.numRows = 0
+        shutil.rmtree(self.tmpDir, ignore_errors = True)
+        os.makedirs(self.tmpDir)
+        return
+    
+    def partitionPath(self, first, part):
+        return os.path.join(self.tmpDir, "half_cycles=%d" % (first), PART_NAME % (part) + FORMATS[self.fmt])
+    
+    # closes the open writer, and opens one for the next part file of the partition starting at first
+    def openWriter(self, first):
+        self.closeWriter()
+        part = self.parts.get(first, 0)
+        self.parts[first] = part + 1
+        path = self.partitionPath(first, part)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        if self.fmt == "hdf5":
+            self.writer = pd.HDFStore(path, mode = "w", complevel = HDF5_COMPLEVEL, complib = "blosc:%s" % (self.compression))
+        elif self.fmt == "parquet":
+            self.writer = importArrow().parquet.ParquetWriter(path, self.schema, compression = self.compression)
+        else:
+            pa = importArrow()
+            self.writer = pa.ipc.new_file(path, self.schema, options = pa.ipc.IpcWriteOptions(compression = self.compression))
+            
+        self.writerFirst = first
+        return
+    
+    # appends a chunk of the measurement sequence, indexed by record number. the rows of a partition need not be
+    # contiguous, but the chunks are expected to follow each other in record order. without a half cycle column, all
+    # rows go to the first partition
+    def write(self, dataframe):
+        if len(dataframe) == 0:
+            return
+        
+        dataframe = dataframe.rename_axis(INDEX_NAME)
+        if PARTITION_COLUMN in dataframe.columns:
+            partition = np.asarray(dataframe[PARTITION_COLUMN]).astype(int) // self.halfCycles
+        else:
+            partition = np.zeros(len(dataframe), dtype = int)
+            
+        # half cycles only ever count up, so a chunk is split into runs of rows in the same partition
+        bounds = np.concatenate([[0], np.flatnonzero(partition[1: ] != partition[: -1]) + 1, [len(partition)]])
+        for start, stop in zip(bounds[: -1], bounds[1: ]):
+            first = partition[start] * self.halfCycles
+            part = dataframe.iloc[start: stop]
+            if self.fmt != "hdf5":
+                part = importArrow().Table.from_pandas(part, preserve_index = True)
+                if self.schema is None:
+                    self.schema = part.schema
+                else:
+                    # in compact mode, counters may have been narrowed differently in each chunk
+                    part = part.cast(self.schema)
+                    
+            if first != self.writerFirst:
+                self.openWriter(first)
+                
+            if self.fmt == "hdf5":
+                self.writer.append(HDF5_KEY, part, format = "table", index = False)
+            else:
+                self.writer.write_table(part)
+                
+        self.numRows += len(dataframe)
+        return
+    
+    def closeWriter(self):
+        if self.writer is not None:
+            self.writer.close()
+            
+        self.writer = None
+        self.writerFirst = None
+        return
+    
+    # finishes the files and moves the cell into place
+    def close(self):
+        self.closeWriter()
+        info = {
+                "metadata": self.metadata, 
+                "format": self.fmt, 
+                "half_cycles": self.halfCycles, 
+                "rows": self.numRows, 
+                }
+        with open(os.path.join(self.tmpDir, INFO_NAME), "wb") as f:
+            pickle.dump(info, f, protocol = pickle.HIGHEST_PROTOCOL)
+            
+        shutil.rmtree(self.cellDir, ignore_errors = True)
+        os.rename(self.tmpDir, self.cellDir)
+        return
+    
+    # gives up on the export, leaving any earlier export of the cell as it was
+    def abort(self):
+        self.closeWriter()
+        shutil.rmtree(self.tmpDir, ignore_errors = True)
+        return
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+            
+        return False
+    
+# exports an experiment that is already in memory. options are passed on to PartitionWriter
+def exportExperiment(experiment, rootDir, cell, **options):
+    with PartitionWriter(rootDir, cell, experiment.metadata, **options) as writer:
+        writer.write(experiment.measurement_sequence)
+        
+    return
+
+def readPartition(path, fmt):
+    if fmt == "hdf5":
+        return pd.read_hdf(path, HDF5_KEY)
+    
+    pa = importArrow()
+    if fmt == "parquet":
+        return pa.parquet.read_table(path).to_pandas()
+    
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+    
+# reads a cell back. half_cycles is a [first, last) range of half cycles to read (either bound may be None), in
+# which case only the partitions overlapping it are read. returns (metadata, dataframe), with the dataframe indexed
+# by record number as it was exported
+def readExport(rootDir, cell, half_cycles = None):
+    with open(os.path.join(cellDir(rootDir, cell), INFO_NAME), "rb") as f:
+        info = pickle.load(f)
+        
+    first, last = half_cycles if half_cycles is not None else (None, None)
+    parts = []
+    for partFirst, path in listPartitions(rootDir, cell, info["format"]):
+        if first is not None and partFirst + info["half_cycles"] <= first:
+            continue
+        
+        if last is not None and partFirst >= last:
+            continue
+        
+        parts.append(readPartition(path, info["format"]))
+        
+    if len(parts) == 0:
+        return info["metadata"], pd.DataFrame()
+    
+    dataframe = pd.concat(parts) if len(parts) > 1 else parts[0]
+    if not dataframe.index.is_monotonic_increasing:
+        dataframe = dataframe.sort_index(kind = "stable")
+        
+    if half_cycles is not None:
+        assert PARTITION_COLUMN in dataframe.columns, "Cell %s has no %s column to select half cycles by" % (cell, PARTITION_COLUMN)
+        
+    if first is not None:
+        dataframe = dataframe.loc[np.asarray(dataframe[PARTITION_COLUMN]) >= first]
+        
+    if last is not None:
+        dataframe = dataframe.loc[np.asarray(dataframe[PARTITION_COLUMN]) < last]
+        
+    dataframe.index.name = None
+    return info["metadata"], dataframe
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:31:09 2026
+
+@author: Kyle
+"""
+
+# timing of the stages of parsing a file. the parsers wrap each stage in
+#     with instrumentation.stage("decode", rows = n) as s:
+#         ...
+# and every listener is called with the finished stage. stages are
+#     header      reading the file and its header
+#     sections    slicing the file into sections and reading their headers
+#     decode      decoding the records
+#     dataframe   building the dataframe from the decoded columns
+#     accumulate  accumulating step time, capacity and half cycles (NDA files)
+#     index       building the segment index of a measurement sequence
+#     summary     summarizing the steps of a measurement sequence
+# with no listeners, stage() hands out a shared object that does nothing, so instrumentation costs next to nothing
+# unless it is used
+
+import time
+import logging
+import contextlib
+
+from . import common
+
+logger = logging.getLogger(__name__)
+
+# called with each finished stage
+listeners = []
+
+def addListener(listener):
+    listeners.append(listener)
+    return
+
+def removeListener(listener):
+    listeners.remove(listener)
+    return
+
+# a stage being timed. info holds anything known about it, such as the number of bytes and rows processed. more can
+# be added with set() while the stage runs
+class Stage(object):
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+        self.start = None
+        self.finish = None
+        return
+    
+    def set(self, **info):
+        self.info.update(info)
+        return
+    
+    def getElapsed(self):
+        return self.finish - self.start
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        self.finish = time.perf_counter()
+        if excType is None:
+            for listener in list(listeners):
+                listener(self)
+                
+        return False
+    
+class NullStage(object):
+    def set(self, **info):
+        return
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        return False
+    
+NULL_STAGE = NullStage()
+
+def stage(name, **info):
+    if len(listeners) == 0:
+        return NULL_STAGE
+    
+    return Stage(name, info)
+
+# listener printing the elapsed time of every stage, like the parsers used to
+def printStage(s):
+    common.printElapsedTime(s.name, s.start, s.finish)
+    return
+
+# listener logging every stage, with its information, at debug level
+def logStage(s):
+    logger.debug("%s finished in %0.6f s %s", s.name, s.getElapsed(), s.info)
+    return
+
+# listener keeping every stage as a dictionary of its name, elapsed time and information, e.g. for saving as JSON
+class Recorder(object):
+    def __init__(self):
+        self.records = []
+        return
+    
+    def __call__(self, s):
+        record = {"stage": s.name, "elapsed_s": s.getElapsed()}
+        record.update(s.info)
+        self.records.append(record)
+        return
+    
+    # total elapsed time of each stage
+    def totals(self):
+        r = dict()
+        for record in self.records:
+            r[record["stage"]] = r.get(record["stage"], 0.) + record["elapsed_s"]
+            
+        return r
+    
+# records the stages run within the block:
+#     with instrumentation.recording() as recorder:
+#         experiment.fromFile(fileName)
+#     print(recorder.records)
+@contextlib.contextmanager
+def recording():
+    recorder = Recorder()
+    addListener(recorder)
+    try:
+        yield recorder
+    finally:
+        removeListener(recorder)
+        
+    return
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:41:07 2026
+
+@author: Kyle
+"""
+
+# helpers for figures and for integrating peaks, moved out of common.py because they need matplotlib and scipy. the
+# parsers never import this module, and common.py only imports it when one of these helpers is used through it
+
+from matplotlib.patches import Rectangle, Wedge
+import numpy as np
+import scipy.integrate
+
+from . import common
+
+def drawErrorBounds(ax, xpos, bottomcent, topcent, width = common.PATCH_WIDTH, patch_color = common.GREY_PATCH):
+    # draw a rectangle
+    ax.add_patch(Rectangle((xpos - width / 2, bottomcent), width, topcent - bottomcent, fill = True, color = patch_color, linewidth = 0))
+    
+    # draw semicircles at both ends
+    ax.add_patch(Wedge((xpos, topcent), width / 2, 0, 180, fill = True, color = patch_color, linewidth = 0))
+    ax.add_patch(Wedge((xpos, bottomcent), width / 2, 180, 360, fill = True, color = patch_color, linewidth = 0))
+    return
+
+def Integrate(y, x, xleft, xright):
+    mask = (x > xleft) & (x < xright)
+    return scipy.integrate.simps(y[mask], x[mask])
+
+def IntegrateWithBaseline(y, x, xleft, xright):
+    yleft, yright = np.interp(xleft, x, y), np.interp(xright, x, y)
+    below_area = 0.5 * (xright - xleft) * (yleft + yright)
+    total_area = Integrate(y, x, xleft, xright)
+    return total_area - below_area
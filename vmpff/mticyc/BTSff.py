@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Nov 29 01:49:29 2023
+
+@author: Kyle
+"""
+
+import mmap
+import copy
+import numpy as np
+
+from ..general import common
+from ..general import instrumentation
+
+# pandas is only imported once the first dataframe is built
+pd = common.LazyModule("pandas")
+
+# bump whenever a change to the parser changes its output, so that cached results are invalidated
+PARSER_VERSION = 1
+
+FILE_HEADER = b"NEWARE"
+YEAR_SLEN, MONTH_SLEN, DAY_SLEN = 4, 2, 2
+BTS_VERSION_STRING_OFFS = 0x70
+BTS_VERSION_STRING_SLEN = 30
+CHANNEL_INFO_OFFS = 0x82b
+USERNAME_OFFS = 0x876
+USERNAME_LEN = 15
+BATCH_LEN = 20
+MEMO_LEN = 100
+STATUS_SUCCESS = 0
+
+UA2MA = lambda x: x * 1E-3
+TMV2V = lambda x: x * 1E-4
+UW2W = lambda x: x * 1E-6
+S2HR = lambda x: x / 3600.
+UAS2MAH = lambda x: S2HR(UA2MA(x))
+UWS2WH = lambda x: S2HR(UW2W(x))
+
+BTS_RECORD_INFO_SPEC = [
+        ("status", np.uint8), 
+        ("record_no", np.uint32), 
+        ("cycle number", np.uint32), 
+        ("Ns", np.uint8), 
+        ("mode", np.uint8), 
+        ("step_time", np.uint32), 
+        ("Ewe", np.int32), 
+        ("current", np.int32), 
+        ("temperature", np.int64), 
+        ("Q charge/discharge", np.int64), 
+        ("Energy charge/discharge", np.int64), 
+        ("clock_time", np.uint64), 
+        ("checksum", np.uint32)
+        ]
+
+BTS_RECORD_INFO = np.dtype(BTS_RECORD_INFO_SPEC)
+BTS_STEP_TYPES = [None, "CC_charge", "CC_discharge", None, "Rest", "Loop", "Stop"]
+
+# conversions of record fields to physical units. the fields are converted to float first
+BTS_CONVERSIONS = {
+        # step time stays in s
+        "step_time": lambda x: x, 
+        # voltage from tenths of mV to V
+        "Ewe": TMV2V, 
+        # current from uA to mA
+        "current": UA2MA, 
+        # capacity from uAs to mAh
+        "Q charge/discharge": UAS2MAH, 
+        # energy from uWs to Wh
+        "Energy charge/discharge": UWS2WH, 
+        }
+# columns accumulated over the records, and the record fields each one is accumulated from
+BTS_ACCUMULATED_COLUMNS = {
+        "half cycle": ["mode"], 
+        "time": ["Ns", "step_time"], 
+        "Q-Q0": ["Ns", "mode", "Q charge/discharge"], 
+        }
+# counters and other integer fields (step time in whole seconds, temperature and clock time), which take the
+# narrowest integer type that holds them in compact mode. the step time is then left as stored, in s, rather than
+# converted to float
+BTS_COMPACT_COUNTERS = ["record_no", "cycle number", "half cycle", "step_time", "temperature", "clock_time"]
+# quantities measured afresh at each record, which are single precision in compact mode. the other fields in
+# physical units are accumulated (over a step, such as the capacity, or over the experiment, such as Q-Q0) and stay
+# double precision, as single precision would lose the small increments added to a large total
+BTS_COMPACT_MEASURED = ["Ewe", "current"]
+# wish there was a way to verify the checksum, but for now it is never decoded
+BTS_FIELDS = [name for name, fmt in BTS_RECORD_INFO_SPEC if name != "checksum"]
+
+# returns the leading edge (smaller index) of changes
+# expects numpy array, so convert using to_numpy() if using pandas
+def findStepChanges(series):
+    return np.where(np.diff(series) != 0)[0]
+
+# returns the record just before each run of trigger values begins (the last record of the previous run). previous
+# is the value preceding the first record (e.g. from the previous chunk), in which case a run beginning at the first
+# record gives index -1. without it, such a run gives index 0, as there is no record before the first one
+def findHalfStepChanges(series, triggers, previous = None):
+    series = np.asarray(series)
+    # there are only ever a couple of triggers, for which comparing one at a time is much faster than np.isin
+    starts = np.zeros(len(series), dtype = bool)
+    for trigger in triggers:
+        starts |= series == trigger
+        
+    starts[1: ] &= series[1: ] != series[: -1]
+    if previous is not None and len(series) > 0:
+        starts[0] &= series[0] != previous
+        
+    changes = np.flatnonzero(starts) - 1
+    if previous is None:
+        changes = np.maximum(0, changes)
+        
+    return changes
+
+# returns, for each record, the number of change indices before it, i.e. the number of the step it belongs to
+# (a change index marks the last record of a step). change indices must be sorted, and may repeat or be -1
+def stepNumbers(series_size, change_indices):
+    counts = np.bincount(np.asarray(change_indices, dtype = int) + 1, minlength = series_size + 1)
+    return np.cumsum(counts[: series_size])
+
+# accumulates a series by referencing step changes, starting from accumulator value a
+# expects numpy array
+def accumulateSeriesSteps(series, change_indices, a = 0.):
+    change_indices = np.asarray(change_indices, dtype = int)
+    # accumulator value of each step, summed in the same order as a running total would be
+    offsets = np.cumsum(np.concatenate([[a], series[change_indices]]).astype(float))
+    return offsets[stepNumbers(len(series), change_indices)] + series
+
+# counts the changes, starting from a
+def fillCount(series_size, change_indices, a = 0):
+    return a + stepNumbers(series_size, change_indices)
+
+# reads the file header and the step definitions that follow it. on return, ptr points to the first data record
+def parseHeader(contents, ptr):
+    # check magic bytes
+    common.checkField(contents, ptr, FILE_HEADER)
+    # initialize header info structure
+    header_info = dict()
+    # get date YYYYMMDD
+    date = dict()
+    date["year"] = int(common.getRaw(contents, ptr, YEAR_SLEN))
+    date["month"] = int(common.getRaw(contents, ptr, MONTH_SLEN))
+    date["day"] = int(common.getRaw(contents, ptr, DAY_SLEN))
+    header_info["date"] = date
+    
+    ptr.setValue(BTS_VERSION_STRING_OFFS)
+    header_info["version"] = common.bytes2Cstring(common.getRaw(contents, ptr, BTS_VERSION_STRING_SLEN))
+    
+    ptr.setValue(CHANNEL_INFO_OFFS)
+    header_info["machine"] = common.getField(contents, ptr, *common.UINT8)
+    header_info["version"] = common.getField(contents, ptr, *common.UINT8)
+    
+    ptr.setValue(USERNAME_OFFS)
+    header_info["username"] = common.bytes2Cstring(common.getRaw(contents, ptr, USERNAME_LEN))
+    header_info["batch"] = common.bytes2Cstring(common.getRaw(contents, ptr, BATCH_LEN))
+    header_info["memo"] = common.bytes2Cstring(common.getRaw(contents, ptr, MEMO_LEN))
+    
+    # this brings us to the step definitions
+    # extract the step definitions from header
+    # TODO: there should be a better way to figure out where this header ends
+    step_infos = [None]
+    step_id = 1
+    while True:
+        assert step_id < 0xff, "Too many steps encountered, possible parsing error"
+        # initialize step info dict
+        step_info = dict()
+        if common.getFieldFlat(contents, ptr.getValue(), *common.UINT8) != step_id:
+            break
+        
+        # update pointer
+        ptr.add(common.UINT8[1])
+        step_info["Ns"] = step_id
+        step_type = common.getField(contents, ptr, *common.UINT8)
+        assert step_type < len(BTS_STEP_TYPES) and BTS_STEP_TYPES[step_type] is not None, "Unrecognized step type"
+        step_info["mode"] = BTS_STEP_TYPES[step_type]
+        if step_info["mode"] in ["CC_charge", "CC_discharge"]:
+            step_info["current"] = UA2MA(common.getField(contents, ptr, *common.INT32))
+            step_info["time"] = common.getField(contents, ptr, *common.INT32)
+            step_info["voltage"] = TMV2V(common.getField(contents, ptr, *common.INT32))
+            ptr.add(2 * common.INT32[1])
+        elif step_info["mode"] == "Rest":
+            step_info["time"] = common.getField(contents, ptr, *common.INT32)
+            ptr.add(4 * common.INT32[1])
+        elif step_info["mode"] == "Loop":
+            step_info["target"] = common.getField(contents, ptr, *common.INT32)
+            step_info["repeats"] = common.getField(contents, ptr, *common.INT32)
+            ptr.add(3 * common.INT32[1])
+        elif step_info["mode"] == "Stop":
+            # no parameters
+            ptr.add(5 * common.INT32[1])
+            
+        step_infos.append(step_info)
+        step_id += 1
+        
+    return header_info, step_infos
+
+# returns the output columns for a list of column names (None for all of them), in the order of a full parse
+def selectColumns(columns):
+    names = BTS_FIELDS + list(BTS_ACCUMULATED_COLUMNS)
+    if columns is None:
+        return names
+    
+    for name in columns:
+        assert name in names, "Column %s not found in %s" % (name, ", ".join(names))
+        
+    return [name for name in names if name in columns]
+
+# returns the record fields needed to produce the given output columns, in record order
+def selectFields(names):
+    needed = set(names)
+    for name, fields in BTS_ACCUMULATED_COLUMNS.items():
+        if name in needed:
+            needed.update(fields)
+            
+    return [name for name in BTS_FIELDS if name in needed]
+
+# converts a structured array of raw records to a dataframe in physical units, dropping invalid records. only the
+# given fields (by default, all but the checksum) are decoded, each straight from its field of the records. with
+# compact set, the measured fields (see BTS_COMPACT_MEASURED) are single rather than double precision, and the integer
+# fields keep their stored type (see BTS_COMPACT_COUNTERS)
+def convertRecords(data, fields = None, compact = False):
+    if fields is None:
+        fields = BTS_FIELDS
+        
+    # remove invalid rows first, so that they are never converted. the index is reset (the original index is
+    # preserved in record_no column)
+    valid = data["status"] == STATUS_SUCCESS
+    dataList = dict()
+    for name in fields:
+        dataList[name] = data[name][valid]
+        if name in BTS_CONVERSIONS and not (compact and name in BTS_COMPACT_COUNTERS):
+            dataList[name] = BTS_CONVERSIONS[name](dataList[name].astype(np.float32 if compact and name in BTS_COMPACT_MEASURED else float))
+            
+    return pd.DataFrame(dataList, index = pd.RangeIndex(np.count_nonzero(valid)))
+
+# keeps the running totals needed to accumulate time, charge and half cycles over consecutive chunks of
+# records, so that a file can be processed piecewise with the same result as fromFile
+class StepAccumulator(object):
+    def __init__(self):
+        # step and mode of the last record seen (None before the first record)
+        self.lastNs = None
+        self.lastMode = None
+        # accumulators at the last record seen
+        self.timeAccum = 0.
+        self.QAccum = 0.
+        self.lastTime = 0.
+        self.lastQ = 0.
+        self.halfCount = 0
+        return
+    
+    # adds the half cycle, time and Q-Q0 columns to a chunk of converted records
+    def update(self, dataframe):
+        if len(dataframe) == 0:
+            dataframe["half cycle"] = np.zeros(0, dtype = int)
+            dataframe["time"] = np.zeros(0)
+            dataframe["Q-Q0"] = np.zeros(0)
+            return dataframe
+        
+        Ns, mode = np.array(dataframe["Ns"]), np.array(dataframe["mode"])
+        # a step change between the last chunk and this one moves the accumulators on to the last values
+        if self.lastNs is not None and Ns[0] != self.lastNs:
+            self.timeAccum, self.QAccum = self.lastTime, self.lastQ
+            
+        step_changes = findStepChanges(Ns)
+        # half step changes are the records just before a charge or discharge begins. one that begins at the
+        # first record of this chunk is a change at the last record of the previous chunk (index -1)
+        triggers = np.array((BTS_STEP_TYPES.index("CC_discharge"), BTS_STEP_TYPES.index("CC_charge")))
+        half_step_changes = findHalfStepChanges(mode, triggers, self.lastMode)
+        dataframe["half cycle"] = fillCount(len(Ns), half_step_changes, self.halfCount)
+        dataframe["time"] = accumulateSeriesSteps(np.array(dataframe["step_time"]), step_changes, self.timeAccum)
+        dataframe["Q-Q0"] = accumulateSeriesSteps(np.array(dataframe["Q charge/discharge"]) * np.where(mode == BTS_STEP_TYPES.index("CC_discharge"), -1, 1), step_changes, self.QAccum)
+        
+        # carry the state over to the next chunk
+        self.halfCount += len(half_step_changes)
+        if len(step_changes) > 0:
+            self.timeAccum = dataframe["time"].iloc[step_changes[-1]]
+            self.QAccum = dataframe["Q-Q0"].iloc[step_changes[-1]]
+            
+        self.lastNs, self.lastMode = Ns[-1], mode[-1]
+        self.lastTime, self.lastQ = dataframe["time"].iloc[-1], dataframe["Q-Q0"].iloc[-1]
+        return dataframe
+    
+# decodes the records [start, stop) of data (rows, given as for slicing) with t0 <= time < t1 (time_range, either
+# bound may be None), indexed as they would be by a full parse. the running totals (the accumulated columns, and the
+# number of valid records before the range) depend on every record before the range, so these are run through
+# first, in chunks and decoding just the step fields. with no accumulated columns and no time range, only the status
+# of the records before the range is read. compact is as in convertRecords. unlike for MPR files, the first record of
+# a time window is not found by binary search, so that finding it takes time in proportion to the records before it:
+# the time column is not stored but accumulated from the step times, and the stored clock time is wall-clock time,
+# which need not advance with it (e.g. while the cycler is paused), so neither can be bisected for t0. besides, the
+# running totals at the start of the window depend on every record before it in any case. the scan decodes only the
+# step fields, and stops at the chunk that reaches t0 (and, for the window itself, at the one that reaches t1)
+def readRecords(data, names, rows = None, time_range = None, chunkRows = common.CHUNK_ROWS, compact = False):
+    start, stop = 0, len(data)
+    if rows is not None:
+        start, stop, step = slice(*rows).indices(len(data))
+        stop = max(start, stop)
+        
+    if time_range is None and not any(name in BTS_ACCUMULATED_COLUMNS for name in names):
+        numValid = np.count_nonzero(data["status"][: start] == STATUS_SUCCESS)
+        dataframe = convertRecords(data[start: stop], selectFields(names), compact)
+        dataframe.index = pd.RangeIndex(numValid, numValid + len(dataframe))
+        return dataframe
+    
+    t0, t1 = time_range if time_range is not None else (None, None)
+    stepFields = selectFields(list(BTS_ACCUMULATED_COLUMNS))
+    accumulator = StepAccumulator()
+    numValid = 0
+    for chunkStart in range(0, start, chunkRows):
+        numValid += len(accumulator.update(convertRecords(data[chunkStart: min(chunkStart + chunkRows, start)], stepFields, compact)))
+        
+    # time is monotonic, so we can skip ahead to the chunk that reaches t0
+    while t0 is not None and start < stop:
+        chunkStop = min(start + chunkRows, stop)
+        before = copy.copy(accumulator)
+        chunk = accumulator.update(convertRecords(data[start: chunkStop], stepFields, compact))
+        if len(chunk) > 0 and chunk["time"].iloc[-1] >= t0:
+            # decode this chunk in full
+            accumulator = before
+            break
+        
+        numValid += len(chunk)
+        start = chunkStop
+        
+    fields = selectFields(names + list(BTS_ACCUMULATED_COLUMNS))
+    chunks = [accumulator.update(convertRecords(data[start: start], fields, compact))]
+    while start < stop:
+        chunkStop = min(start + chunkRows, stop)
+        chunk = accumulator.update(convertRecords(data[start: chunkStop], fields, compact))
+        chunk.index = pd.RangeIndex(numValid, numValid + len(chunk))
+        chunks.append(chunk)
+        numValid += len(chunk)
+        start = chunkStop
+        if t1 is not None and len(chunk) > 0 and chunk["time"].iloc[-1] >= t1:
+            break
+        
+    dataframe = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    if t0 is not None:
+        dataframe = dataframe.loc[np.array(dataframe["time"]) >= t0]
+        
+    if t1 is not None:
+        dataframe = dataframe.loc[np.array(dataframe["time"]) < t1]
+        
+    return dataframe[names]
+
+# converts a dataframe to the least memory it fits in: the measured fields to single precision and the counters and
+# other integer fields to the narrowest integer type holding them. the accumulated columns (time, Q-Q0 and the
+# capacity and energy of each step) stay double precision
+def compactColumns(dataframe):
+    for name in dataframe.columns:
+        if name in BTS_COMPACT_COUNTERS:
+            dataframe[name] = common.narrowInteger(dataframe[name])
+        elif name in BTS_COMPACT_MEASURED:
+            dataframe[name] = np.asarray(dataframe[name], dtype = np.float32)
+            
+    return dataframe
+
+# columns is a list of the names of the columns to produce (None for all of them). only the record fields needed
+# for these are decoded. rows and time_range restrict the records decoded (see readRecords), in which case the file
+# is memory-mapped rather than read. with compact set, the columns take as little memory as they fit in (see
+# compactColumns)
+def fromFile(fileName, columns = None, rows = None, time_range = None, compact = False):
+    names = selectColumns(columns)
+    ptr = common.pointer()
+    partial = rows is not None or time_range is not None
+    with instrumentation.stage("header", file = fileName, memmap = partial) as s:
+        with open(fileName, "rb") as f:
+            if partial:
+                contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+            else:
+                contents = f.read()
+                
+        header_info, step_infos = parseHeader(contents, ptr)
+        s.set(bytes = len(contents), steps = len(step_infos) - 1)
+        
+    if partial:
+        with instrumentation.stage("decode", mode = "range") as s:
+            dataframe = readRecords(np.frombuffer(contents, dtype = BTS_RECORD_INFO, offset = ptr.getValue()), names, rows, time_range, compact = compact)
+            s.set(rows = len(dataframe))
+            
+        if compact:
+            dataframe = compactColumns(dataframe)
+            
+        return header_info, step_infos, dataframe
+    
+    # this brings us to the data records
+    # the pointer object holds the offset to the data records
+    # use numpy frombuffer with this offset to efficiently extract data
+    with instrumentation.stage("decode", bytes = len(contents) - ptr.getValue()) as s:
+        data = np.frombuffer(contents, dtype = BTS_RECORD_INFO, offset = ptr.getValue())
+        dataframe = convertRecords(data, selectFields(names), compact)
+        s.set(rows = len(dataframe))
+        
+    # now, we accumulate some variables, such as time and charge
+    # referenced to the beginning of the experiment
+    with instrumentation.stage("accumulate", rows = len(dataframe)):
+        if "time" in names or "Q-Q0" in names:
+            # find the rows where the step changes (leading edge)
+            step_changes = findStepChanges(np.array(dataframe["Ns"]))
+            
+        if "half cycle" in names:
+            # find where the current changes direction (occurs less frequently than step_changes)
+            half_step_changes = findHalfStepChanges(np.array(dataframe["mode"]), (BTS_STEP_TYPES.index("CC_discharge"), BTS_STEP_TYPES.index("CC_charge")))
+            dataframe["half cycle"] = fillCount(len(dataframe), half_step_changes)
+            
+        if "time" in names:
+            dataframe["time"] = accumulateSeriesSteps(np.array(dataframe["step_time"]), step_changes)
+            
+        if "Q-Q0" in names:
+            dataframe["Q-Q0"] = accumulateSeriesSteps(np.array(dataframe["Q charge/discharge"]) * np.where(np.array(dataframe["mode"]) == BTS_STEP_TYPES.index("CC_discharge"), -1, 1), step_changes)
+            
+    if columns is not None:
+        # drop the fields that were only needed to accumulate
+        dataframe = dataframe[names]
+        
+    if compact:
+        dataframe = compactColumns(dataframe)
+        
+    return header_info, step_infos, dataframe
+
+# decodes the data records of a file in chunks of at most rows records, yielding a dataframe for each. the file
+# is memory-mapped, and the accumulated columns carry over between chunks, so concatenating all chunks gives
+# the same data as fromFile. columns restricts the columns produced, as in fromFile
+def iterChunks(fileName, rows = common.CHUNK_ROWS, columns = None):
+    assert rows > 0, "Chunk size must be positive"
+    names = selectColumns(columns)
+    # the accumulator carries all accumulated columns along
+    fields = selectFields(names + list(BTS_ACCUMULATED_COLUMNS))
+    ptr = common.pointer()
+    with instrumentation.stage("header", file = fileName, memmap = True) as s:
+        with open(fileName, "rb") as f:
+            contents = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+            
+        header_info, step_infos = parseHeader(contents, ptr)
+        s.set(bytes = len(contents), steps = len(step_infos) - 1)
+        
+    data = np.frombuffer(contents, dtype = BTS_RECORD_INFO, offset = ptr.getValue())
+    accumulator = StepAccumulator()
+    numRows = 0
+    for start in range(0, len(data), rows):
+        with instrumentation.stage("decode", mode = "chunk", bytes = data[start: start + rows].nbytes) as s:
+            dataframe = convertRecords(data[start: start + rows], fields)
+            s.set(rows = len(dataframe))
+            
+        with instrumentation.stage("accumulate", rows = len(dataframe)):
+            dataframe = accumulator.update(dataframe)
+            
+        if columns is not None:
+            dataframe = dataframe[names]
+            
+        dataframe.index = pd.RangeIndex(numRows, numRows + len(dataframe))
+        numRows += len(dataframe)
+        yield dataframe
+        
+    return
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:40:12 2026
+
+@author: Kyle
+"""
+
+# Neware NDA files written by MTI cyclers: the parser (BTSff), and the experiment classes built on it (cycle_metrics)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 28 13:02:41 2023
+
+@author: Kyle
+"""
+
+from . import BTSff
+
+from ..general import common
+from ..general import cycle_tools
+from ..general import export
+
+# columns the segment index is built from, which are decoded even if not asked for
+INDEX_COLUMNS = ["Ns", "half cycle"]
+
+# class representing experiments recorded by MTI Cycler
+class MTICycExperiment(object):
+    def __init__(self):
+        self.segment_index = None
+        return
+    
+    # instantiate fromFile. if a cache (see general/cache.py) is given, the parsed data are taken from it when
+    # the file has not changed since. columns restricts the measurement sequence to a list of column names (plus
+    # INDEX_COLUMNS), so that only the record fields needed for these are decoded. rows (start, stop) and time_range
+    # (t0, t1) restrict it to a range of records (see BTSff.readRecords). set compact to hold the measurement
+    # sequence in as little memory as it fits in (see BTSff.compactColumns)
+    def fromFile(self, fileName, cache = None, columns = None, rows = None, time_range = None, compact = False):
+        if columns is not None:
+            columns = list(columns) + [name for name in INDEX_COLUMNS if name not in columns]
+            
+        if cache is not None:
+            parser = ("BTSff", BTSff.PARSER_VERSION)
+            if columns is not None:
+                parser += (tuple(sorted(columns)), )
+                
+            if rows is not None or time_range is not None:
+                parser += (("rows", rows, "time_range", time_range), )
+                
+            if compact:
+                parser += ("compact", )
+                
+            key = cache.key(fileName, parser)
+            entry = cache.load(key)
+            if entry is not None:
+                self.metadata, self.measurement_sequence = entry
+                return
+            
+        x1, x2, Y = BTSff.fromFile(fileName, columns = columns, rows = rows, time_range = time_range, compact = compact)
+        self.metadata = [x1, x2]
+        self.measurement_sequence = Y
+        if cache is not None:
+            cache.store(key, self.metadata, self.measurement_sequence)
+            
+        return
+    
+    # export a file to partitioned columnar files (see general/export.py) as the given cell. the file is mapped and
+    # decoded a chunk of rows records at a time, so it is never held in memory as a whole. columns is as in fromFile,
+    # and options are passed on to export.PartitionWriter (e.g. fmt = "arrow"). the columns keep their full types,
+    # as compact mode would narrow counters differently from chunk to chunk; to export a compact measurement
+    # sequence, load it with fromFile and use export.exportExperiment
+    def exportFile(self, fileName, rootDir, cell, columns = None, rows = common.CHUNK_ROWS, **options):
+        if columns is not None:
+            columns = list(columns) + [name for name in INDEX_COLUMNS if name not in columns]
+            
+        # an empty range of records reads just the header
+        header_info, step_infos, Y = BTSff.fromFile(fileName, rows = (0, 0))
+        self.metadata = [header_info, step_infos]
+        with export.PartitionWriter(rootDir, cell, self.metadata, **options) as writer:
+            for chunk in BTSff.iterChunks(fileName, rows, columns):
+                writer.write(chunk)
+                
+        return
+    
+    # the half cycle table (see cycle_tools.GalvanostaticCyclingExperiment.streamHalfCycleTable) of a file, decoded a
+    # chunk of rows records at a time, so that only one chunk is ever held in memory. rests are steps of their own,
+    # so they are kept as half cycles of their own, as in getHalfCycleExtents. the measurement sequence is left as it
+    # is. pass the result to calculate_CE_table for the Coulombic efficiencies
+    def streamFile(self, fileName, rows = common.CHUNK_ROWS):
+        return self.streamHalfCycleTable(BTSff.iterChunks(fileName, rows, cycle_tools.STREAM_COLUMNS))
+    
+    # instantiate from a cell written by exportFile (or export.exportExperiment). half_cycles is a [first, last)
+    # range of half cycles to read, in which case only the partitions holding these are read
+    def fromExport(self, rootDir, cell, half_cycles = None):
+        self.metadata, self.measurement_sequence = export.readExport(rootDir, cell, half_cycles)
+        return
+    
+    # index of the measurement sequence by step and half cycle. it is built once for each measurement sequence,
+    # on first use
+    def getSegmentIndex(self):
+        if self.segment_index is None or self.segment_index.source is not self.measurement_sequence:
+            self.segment_index = cycle_tools.SegmentIndex(self.measurement_sequence, [self.measurement_sequence["Ns"], self.measurement_sequence["half cycle"]])
+            
+        return self.segment_index
+    
+    # row positions of a half cycle, as a list of [start, stop) spans. the rest is the step that follows
+    def getCycleSpans_hc(self, cycle, half_cycle, include_rest):
+        keys = [(cycle, half_cycle)]
+        if include_rest:
+            keys.append((cycle + 1, half_cycle))
+            
+        return self.getSegmentIndex().spans(keys)
+    
+    def getHalfCycleExtents(self):
+        index = self.getSegmentIndex()
+        Ns, half_cycle = index.keys
+        return cycle_tools.halfCycleExtents(Ns, half_cycle, index.starts, index.stops)
+    
+    def getCycleDataIdx_hc(self, cycle, half_cycle, include_rest):
+        return self.measurement_sequence.index[cycle_tools.spanIndices(self.getCycleSpans_hc(cycle, half_cycle, include_rest))]
+    
+    def getCycleData_hc(self, cycle, half_cycle, include_rest):
+        return cycle_tools.sliceSpans(self.measurement_sequence, self.getCycleSpans_hc(cycle, half_cycle, include_rest))
+    
+    
+class MTICycMODE1CyclingExperiment(MTICycExperiment, cycle_tools.MODE1CyclingExperiment):
+    def __init__(self, area):
+        MTICycExperiment.__init__(self)
+        cycle_tools.MODE1CyclingExperiment.__init__(self, area, REST = (1, 0), CYCLE_PLATING = (2, 1), CYCLE_STRIPPING = (4, 2))
+        return
+    
+    
+class MTICycPNNLCyclingExperiment(MTICycExperiment, cycle_tools.PNNLCyclingExperiment):
+    def __init__(self, area):
+        MTICycExperiment.__init__(self)
+        cycle_tools.PNNLCyclingExperiment.__init__(self, area, REST = (1, 0), INITIAL_PLATING = (2, 1), INITIAL_STRIPPING = (4, 2), TEST_PLATING = (6, 3), SHORT_CYCLE_STRIPPING = (8, 4), SHORT_CYCLE_PLATING = (10, 5), TEST_STRIPPING = (13, 24), NUM_SHORT_CYCLES = 10)
+        return
+    
+    
\ No newline at end of file